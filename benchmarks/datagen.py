@@ -0,0 +1,124 @@
+"""
+Synthetic data for the benchmarks: menus of any size and order histories of
+tens of thousands to tens of millions of sale lines, written straight into the
+databases the register uses. Output is reproducible for a given seed.
+
+    python benchmarks/datagen.py --data-dir /tmp/pos-bench --items 100 --orders 100000
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from db import POS_DB, set_data_dir, transaction  # noqa: E402
+from inventory_db import rebuild_daily_totals  # noqa: E402
+from schema import migrate  # noqa: E402
+
+# Sale lines written per transaction while generating history
+CHUNK_SIZE = 50_000
+
+# First day of generated history
+HISTORY_START = datetime(2023, 1, 1, 8, 0, 0)
+
+
+# Fill items with a synthetic menu
+def generate_menu(item_count, seed=0):
+    """
+    Replaces the menu with item_count synthetic items. Call generate_orders
+    afterwards, as the old sale ledger refers to the items being replaced.
+    Args:
+        item_count (int): Number of menu items.
+        seed (int): Random seed.
+    Returns:
+        list of tuple: (item_id, name, price_cents) of each generated item.
+    """
+    rng = random.Random(seed)
+    items = [(index + 1, f"Item {index:04d}", rng.randrange(1000, 50000)) for index in range(item_count)]
+    migrate()
+    with transaction(POS_DB) as cursor:
+        for table in ("sale_lines", "sales", "daily_item_totals", "hourly_totals", "items"):
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.executemany("INSERT INTO items (id, name, price_cents, image_path) VALUES (?, ?, ?, NULL)", items)
+    return items
+
+
+# Fill the sale ledger with a synthetic order history
+def generate_orders(line_count, menu, seed=0, days=365, lines_per_sale=3):
+    """
+    Replaces the sale ledger with about line_count sale lines spread evenly over
+    the given number of days, then rebuilds the daily rollups from them.
+    Args:
+        line_count (int): Number of sale lines to write.
+        menu (list of tuple): (item_id, name, price_cents) items to sell, as returned by generate_menu.
+        seed (int): Random seed.
+        days (int): Length of the generated history in days.
+        lines_per_sale (int): Average number of lines per sale.
+    """
+    rng = random.Random(seed)
+    migrate()
+    with transaction(POS_DB) as cursor:
+        cursor.execute("DELETE FROM sale_lines")
+        cursor.execute("DELETE FROM sales")
+        cursor.execute("DELETE FROM daily_item_totals")
+        cursor.execute("DELETE FROM hourly_totals")
+
+    sale_count = max(1, line_count // lines_per_sale)
+    seconds_per_sale = days * 86400 / sale_count
+    sale_id = 0
+    written = 0
+    while written < line_count:
+        sales = []
+        lines = []
+        while written < line_count and len(lines) < CHUNK_SIZE:
+            sale_id += 1
+            date = HISTORY_START + timedelta(seconds=int(sale_id * seconds_per_sale))
+            sale_total = 0
+            for _ in range(min(rng.randint(1, 2 * lines_per_sale - 1), line_count - written)):
+                item_id, name, price_cents = menu[rng.randrange(len(menu))]
+                quantity = rng.randint(1, 4)
+                total = price_cents * quantity
+                sale_total += total
+                lines.append((sale_id, item_id, quantity, price_cents, total))
+                written += 1
+            sales.append((sale_id, date.strftime("%Y-%m-%d %H:%M:%S"), sale_total))
+        with transaction(POS_DB) as cursor:
+            cursor.executemany("INSERT INTO sales (id, date, total_cents) VALUES (?, ?, ?)", sales)
+            cursor.executemany("""INSERT INTO sale_lines (sale_id, item_id, quantity, price_cents, total_cents)
+                                  VALUES (?, ?, ?, ?, ?)""", lines)
+
+    rebuild_daily_totals()
+
+
+# Generate a complete data directory
+def generate(data_dir, item_count, line_count, seed=0):
+    """
+    Points the connection layer at data_dir and fills it with a synthetic
+    menu and order history.
+    Returns:
+        list of tuple: The generated menu.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    set_data_dir(data_dir)
+    menu = generate_menu(item_count, seed)
+    generate_orders(line_count, menu, seed)
+    return menu
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Pastilan POS data")
+    parser.add_argument("--data-dir", required=True, help="directory to write pos.db into")
+    parser.add_argument("--items", type=int, default=100, help="number of menu items")
+    parser.add_argument("--orders", type=int, default=10_000, help="number of sale lines")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate(args.data_dir, args.items, args.orders, args.seed)
+    print(f"wrote {args.items} items and {args.orders} sale lines to {args.data_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Times the register's hot paths against synthetic data and writes the results
+as JSON, optionally comparing them with a stored baseline.
+
+    python benchmarks/run_benchmarks.py --scale small --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Qt benchmarks run under the offscreen platform and are skipped if PyQt6 is
+not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from datagen import HISTORY_START, generate  # noqa: E402
+from db import set_data_dir  # noqa: E402
+from inventory_db import record_sale  # noqa: E402
+from inventory_viewer import get_inventory_between, get_inventory_by_date, get_period_range, get_total_between  # noqa: E402
+from menu_db import load_menu_items  # noqa: E402
+from menu_search import MenuSearchIndex  # noqa: E402
+
+# (menu sizes, sale line counts) for each scale; every pair is one scenario
+SCALES = {
+    "small": ([10, 100], [10_000]),
+    "medium": ([10, 100, 1_000], [10_000, 100_000, 1_000_000]),
+    "large": ([10, 100, 1_000], [10_000, 100_000, 1_000_000, 10_000_000]),
+}
+
+# A benchmark is reported as slower when its median grows past this ratio
+DEFAULT_THRESHOLD = 1.25
+
+
+def measure(function, repeat):
+    """
+    Calls function repeat times.
+    Returns:
+        dict: Minimum, median and 95th percentile time per call, in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def random_day(rng):
+    return (HISTORY_START + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d")
+
+
+def db_benchmarks(menu, repeat, rng):
+    results = {}
+    sale = [(item_id, 2, price_cents, price_cents * 2) for item_id, name, price_cents in menu[:3]]
+    results["record_sale"] = measure(lambda: record_sale(sale), repeat)
+    results["load_menu_items"] = measure(load_menu_items, repeat)
+    index = MenuSearchIndex(load_menu_items())
+    names = [name for item_id, name, price_cents in menu]
+    # What a cashier has typed a few keys into a name: a word prefix, then a mid-word fragment
+    results["menu_search_prefix"] = measure(lambda: index.search(rng.choice(names)[:6]), repeat)
+    results["menu_search_substring"] = measure(lambda: index.search(rng.choice(names)[-3:]), repeat)
+    results["get_inventory_by_date"] = measure(lambda: get_inventory_by_date(random_day(rng)), repeat)
+    results["get_inventory_between_month"] = measure(
+        lambda: get_inventory_between(*get_period_range(random_day(rng), "Month")), repeat)
+    results["get_total_between_month"] = measure(
+        lambda: get_total_between(*get_period_range(random_day(rng), "Month")), repeat)
+    return results
+
+
+def qt_benchmarks(menu, repeat):
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        return {}
+    from main import POSMainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    window = POSMainWindow()
+    try:
+        def rebuild_grid():
+            # Drop every tile so the grid is built from scratch
+            for tile in window.product_tiles.values():
+                window.product_grid.removeWidget(tile)
+                tile.deleteLater()
+            window.product_tiles.clear()
+            window.update_product_grid()
+            app.processEvents()
+
+        results["update_product_grid_full"] = measure(rebuild_grid, repeat)
+        results["update_product_grid_unchanged"] = measure(window.update_product_grid, repeat)
+
+        products = list(window.menu_items)
+        results["add_to_order"] = measure(lambda: window.add_to_order(products[len(window.cart_model.cart) % len(products)]), repeat)
+    finally:
+        window.sale_writer.stop()
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+    return results
+
+
+def run(scale, repeat, seed):
+    menu_sizes, line_counts = SCALES[scale]
+    results = {}
+    for line_count in line_counts:
+        for item_count in menu_sizes:
+            scenario = f"items={item_count},lines={line_count}"
+            data_dir = tempfile.mkdtemp(prefix="pos-bench-")
+            try:
+                started = time.perf_counter()
+                menu = generate(data_dir, item_count, line_count, seed)
+                print(f"{scenario}: generated in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+                rng = random.Random(seed)
+                for name, timing in db_benchmarks(menu, repeat, rng).items():
+                    results[f"{scenario}/{name}"] = timing
+                for name, timing in qt_benchmarks(menu, repeat).items():
+                    results[f"{scenario}/{name}"] = timing
+            finally:
+                set_data_dir(None)
+                shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares median timings against a baseline run.
+    Returns:
+        list of tuple: (benchmark, baseline_ms, current_ms) for every benchmark
+        whose median grew past threshold times the baseline.
+    """
+    regressions = []
+    for name, timing in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and timing["median_ms"] > previous["median_ms"] * threshold:
+            regressions.append((name, previous["median_ms"], timing["median_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Pastilan POS hot paths")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=50, help="calls timed per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="median slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": run(args.scale, args.repeat, args.seed),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report["results"], baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
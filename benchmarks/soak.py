@@ -0,0 +1,417 @@
+"""
+Soak test: drives POSMainWindow under the offscreen Qt platform with a
+scripted rush-hour cashier and reports per-action latency percentiles,
+event-loop stalls, memory and widget growth, and database file growth.
+
+    python benchmarks/soak.py --duration 600 --rate 20 --output soak.json
+    python benchmarks/soak.py --duration 3600 --items 1000 --orders 1000000 --perf
+
+At one action every three seconds a cashier makes about 12,000 actions in a
+ten-hour day, so the first example replays a full day in ten minutes. Without
+--data-dir the soak runs on freshly generated data in a temporary directory;
+with it, on the data already there, so point it at a copy. Requires PyQt6.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from datagen import HISTORY_START, generate  # noqa: E402
+from db import POS_DB, db_path, set_data_dir  # noqa: E402
+from menu_db import add_menu_item, remove_menu_item  # noqa: E402
+from schema import migrate  # noqa: E402
+import perf  # noqa: E402
+
+try:
+    from PyQt6.QtCore import QDate, QTimer
+    from PyQt6.QtWidgets import QApplication, QWidget
+    from inventory_dialog import ViewInventoryDialog
+    from main import POSMainWindow
+except ImportError:
+    QApplication = None
+
+# Relative frequency of each cashier action
+ACTION_WEIGHTS = {
+    "add_to_order": 40,
+    "quick_add": 15,
+    "subtract_qty": 8,
+    "checkout": 15,
+    "search": 10,
+    "inventory_lookup": 4,
+    "menu_edit": 2,
+}
+
+# Interval of the heartbeat timer that detects event-loop stalls, in ms
+HEARTBEAT_MS = 10
+
+# A heartbeat this much later than scheduled counts as a stall, in ms
+STALL_THRESHOLD_MS = 50
+
+# Items the soak keeps on the menu at most; past this, menu edits remove them
+MAX_SOAK_ITEMS = 20
+
+# Longest wait for the product grid to fill in before the soak starts, in seconds
+WARMUP_TIMEOUT = 60
+
+
+def summarize(samples):
+    """
+    Returns count, mean, 50th/95th/99th percentile and maximum of a list of
+    timings in milliseconds.
+    """
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 4)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def rss_bytes():
+    """Returns the process's resident memory, or its peak where the current value cannot be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def database_bytes():
+    """Returns the size of pos.db with its WAL and shared-memory files, in bytes."""
+    path = db_path(POS_DB)
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(path + suffix))
+
+
+class Cashier:
+    """
+    Runs random cashier actions on a main window from a timer, as a person
+    clicking and typing would, and samples the process between them. Each
+    action is timed until the event loop has processed everything it posted,
+    so layout and deferred deletes count against the action that caused them.
+    """
+
+    def __init__(self, app, window, rate, seed, sample_interval):
+        self.app = app
+        self.window = window
+        self.rng = random.Random(seed)
+        self.actions = list(ACTION_WEIGHTS)
+        self.weights = list(ACTION_WEIGHTS.values())
+        self.latencies = {action: [] for action in self.actions}
+        self.stalls = []
+        self.samples = []
+        self.soak_items = []
+        self.next_item = 0
+        self.checkouts = 0
+        self.saved = 0
+        self.failures = 0
+        self.inventory_dialog = None
+        self.started = None
+        self.last_beat = None
+
+        window.sale_writer.sale_saved.connect(self.sale_saved)
+        window.sale_writer.sale_failed.connect(self.sale_failed)
+
+        self.action_timer = QTimer()
+        self.action_timer.setInterval(round(1000 / rate) if rate > 0 else 0)
+        self.action_timer.timeout.connect(self.step)
+        self.heartbeat_timer = QTimer()
+        self.heartbeat_timer.setInterval(HEARTBEAT_MS)
+        self.heartbeat_timer.timeout.connect(self.beat)
+        self.sample_timer = QTimer()
+        self.sample_timer.setInterval(round(sample_interval * 1000))
+        self.sample_timer.timeout.connect(self.sample)
+
+    def sale_saved(self, uid):
+        self.saved += 1
+
+    def sale_failed(self, uid, message):
+        self.failures += 1
+
+    def warm_up(self):
+        """
+        Lets the product grid fill in, as it does after startup, and builds the
+        inventory dialog, so one-off widgets are in the first sample rather
+        than counted as growth.
+        """
+        deadline = time.perf_counter() + WARMUP_TIMEOUT
+        while len(self.window.product_tiles) < len(self.window.menu_items) and time.perf_counter() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.inventory_lookup()
+        self.app.processEvents()
+
+    def run(self, duration):
+        """Runs the soak for duration seconds of wall time."""
+        self.warm_up()
+        self.started = self.last_beat = time.perf_counter()
+        self.sample()
+        self.action_timer.start()
+        self.heartbeat_timer.start()
+        self.sample_timer.start()
+        QTimer.singleShot(round(duration * 1000), self.app.quit)
+        self.app.exec()
+        for timer in (self.action_timer, self.heartbeat_timer, self.sample_timer):
+            timer.stop()
+
+    def finish(self):
+        """Stores the sales still queued and takes the closing sample."""
+        self.window.sale_writer.stop()
+        self.app.processEvents()  # Deliver the sale_saved signals from the writer thread
+        self.sample()
+
+    def beat(self):
+        now = time.perf_counter()
+        late_ms = (now - self.last_beat) * 1000 - HEARTBEAT_MS
+        if late_ms > STALL_THRESHOLD_MS:
+            self.stalls.append(late_ms)
+        self.last_beat = now
+
+    def sample(self):
+        self.samples.append({
+            "elapsed_s": round(time.perf_counter() - self.started, 3),
+            "rss_bytes": rss_bytes(),
+            "python_objects": len(gc.get_objects()),
+            "widgets": len(QApplication.allWidgets()),
+            "product_tiles": len(self.window.product_tiles),
+            "result_tiles": len(self.window.result_tiles),
+            "menu_items": len(self.window.menu_items),
+            "cart_lines": len(self.window.cart_model.cart),
+            "database_bytes": database_bytes(),
+            "sales_saved": self.saved,
+        })
+
+    def step(self):
+        action = self.rng.choices(self.actions, self.weights)[0]
+        cart = self.window.cart_model.cart
+        if action in ("subtract_qty", "checkout") and len(cart) == 0:
+            action = "add_to_order"  # Nothing to take off or ring up yet
+
+        start = time.perf_counter()
+        getattr(self, action)()
+        self.app.processEvents()
+        self.latencies[action].append((time.perf_counter() - start) * 1000)
+
+    def add_to_order(self):
+        self.window.add_to_order(self.rng.choice(self.window.menu_items))
+
+    def quick_add(self):
+        # Type part of a name, or the code, and press Enter
+        product = self.rng.choice(self.window.menu_items)
+        query = product.get("code") or product["name"][:max(3, len(product["name"]) - 2)]
+        self.window.search_box.setText(query)
+        self.window.quick_add()
+
+    def subtract_qty(self):
+        line = self.rng.choice(self.window.cart_model.cart.lines)
+        self.window.subtract_qty(line.item_id)
+
+    def checkout(self):
+        self.window.checkout()
+        self.checkouts += 1
+
+    def search(self):
+        # Alternate between narrowing the grid and going back to the whole menu
+        if self.window.search_box.text():
+            self.window.search_box.clear()
+        else:
+            name = self.rng.choice(self.window.menu_items)["name"]
+            self.window.search_box.setText(name[:self.rng.randint(2, 4)])
+        self.window.apply_search()
+
+    def inventory_lookup(self):
+        if self.inventory_dialog is None:
+            self.inventory_dialog = ViewInventoryDialog()
+        day = HISTORY_START + timedelta(days=self.rng.randrange(365))
+        dialog = self.inventory_dialog
+        dialog.period_select.setCurrentIndex(self.rng.randrange(dialog.period_select.count()))
+        dialog.calendar.setSelectedDate(QDate(day.year, day.month, day.day))
+        dialog.inventory_model.rowCount()
+        # Close it as the cashier would; this releases the table's open cursor,
+        # which would otherwise pin a read snapshot and block menu edits
+        dialog.done(0)
+
+    def menu_edit(self):
+        if self.soak_items and (len(self.soak_items) >= MAX_SOAK_ITEMS or self.rng.random() < 0.5):
+            name = self.soak_items.pop(self.rng.randrange(len(self.soak_items)))
+            remove_menu_item(name)
+        else:
+            name = f"Soak Item {self.next_item:05d}"
+            self.next_item += 1
+            add_menu_item(name, self.rng.randrange(1000, 50000), None)
+            self.soak_items.append(name)
+        self.window.refresh_menu()
+
+    def report(self, duration):
+        """Returns the soak results as a dict ready for JSON."""
+        first, last = self.samples[0], self.samples[-1]
+        performed = sum(len(samples) for samples in self.latencies.values())
+
+        def growth(key):
+            values = [sample[key] for sample in self.samples if sample[key] is not None]
+            if not values:
+                return None
+            return {"start": values[0], "end": values[-1], "peak": max(values), "growth": values[-1] - values[0]}
+
+        # Widgets outside the product grids should hold steady; tiles come and go
+        # with the menu, and the search results grid grows to at most one page
+        widgets_per_tile = None
+        if self.window.product_tiles:
+            tile = next(iter(self.window.product_tiles.values()))
+            widgets_per_tile = 1 + len(tile.findChildren(QWidget))
+        outside_grid = None
+        if widgets_per_tile:
+            outside_grid = {
+                "start": first["widgets"] - (first["product_tiles"] + first["result_tiles"]) * widgets_per_tile,
+                "end": last["widgets"] - (last["product_tiles"] + last["result_tiles"]) * widgets_per_tile,
+            }
+            outside_grid["growth"] = outside_grid["end"] - outside_grid["start"]
+
+        return {
+            "actions": {action: summarize(samples) for action, samples in self.latencies.items()},
+            "throughput": {
+                "actions": performed,
+                "actions_per_s": round(performed / duration, 2) if duration else None,
+            },
+            "event_loop": {
+                "heartbeat_ms": HEARTBEAT_MS,
+                "stall_threshold_ms": STALL_THRESHOLD_MS,
+                "stalls": summarize(self.stalls),
+                "stalled_ms": round(sum(self.stalls), 1),
+            },
+            "growth": {
+                "rss_bytes": growth("rss_bytes"),
+                "python_objects": growth("python_objects"),
+                "widgets": growth("widgets"),
+                "widgets_outside_grid": outside_grid,
+                "product_tiles": growth("product_tiles"),
+                "database_bytes": growth("database_bytes"),
+            },
+            "sales": {"checkouts": self.checkouts, "saved": self.saved, "save_failures": self.failures},
+            "samples": self.samples,
+        }
+
+
+def print_summary(report, stream=sys.stderr):
+    """Prints the headline numbers of a soak report."""
+    print(f"{'action':<18} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}", file=stream)
+    for action, stats in report["actions"].items():
+        if stats["count"]:
+            print(f"{action:<18} {stats['count']:7d} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} "
+                  f"{stats['p99_ms']:9.2f} {stats['max_ms']:9.2f}", file=stream)
+    stalls = report["event_loop"]["stalls"]
+    if stalls["count"]:
+        print(f"event loop: {stalls['count']} stalls over {STALL_THRESHOLD_MS} ms, "
+              f"longest {stalls['max_ms']:.0f} ms, {report['event_loop']['stalled_ms']:.0f} ms in total", file=stream)
+    else:
+        print(f"event loop: no stalls over {STALL_THRESHOLD_MS} ms", file=stream)
+    for name, values in report["growth"].items():
+        if values:
+            print(f"{name}: {values['start']} -> {values['end']} ({values['growth']:+d})", file=stream)
+    sales = report["sales"]
+    print(f"sales: {sales['checkouts']} checked out, {sales['saved']} saved, "
+          f"{sales['save_failures']} failed saves", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test the Pastilan POS register with a scripted cashier")
+    parser.add_argument("--duration", type=float, default=300, help="seconds to run the soak for")
+    parser.add_argument("--rate", type=float, default=20, help="cashier actions per second (0: as fast as possible)")
+    parser.add_argument("--items", type=int, default=200, help="menu items to generate")
+    parser.add_argument("--orders", type=int, default=100_000, help="sale lines of history to generate")
+    parser.add_argument("--data-dir", help="soak on the data in this directory instead of generated data")
+    parser.add_argument("--sample-interval", type=float, default=5, help="seconds between memory and size samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--perf", action="store_true", help="also report the timing layer's per-call-site numbers")
+    parser.add_argument("--output", help="write the report JSON to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if QApplication is None:
+        print("The soak test needs PyQt6.", file=sys.stderr)
+        return 2
+
+    # Turn on the timing layer before any database connection is opened
+    if args.perf:
+        perf.enable()
+
+    temp_dir = None
+    if args.data_dir:
+        set_data_dir(args.data_dir)
+        migrate()
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="pos-soak-")
+        started = time.perf_counter()
+        generate(temp_dir, args.items, args.orders, args.seed)
+        print(f"generated {args.items} items and {args.orders} sale lines in "
+              f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = POSMainWindow()
+    window.show()
+    try:
+        cashier = Cashier(app, window, args.rate, args.seed, args.sample_interval)
+        cashier.run(args.duration)
+        cashier.finish()
+        results = cashier.report(args.duration)
+    finally:
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+        set_data_dir(None)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": args.duration,
+            "rate": args.rate,
+            "items": None if args.data_dir else args.items,
+            "orders": None if args.data_dir else args.orders,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        **results,
+    }
+    if args.perf:
+        report["perf"] = perf.snapshot()
+
+    print_summary(report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+from db import POS_DB, get_connection
+from inventory_viewer import range_clause
+from perf import timed
+
+# NumPy is only needed for analytics; the register runs without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def is_available():
+    """Returns True if NumPy is installed."""
+    return np is not None
+
+
+def _day_numbers(days):
+    # "YYYY-MM-DD" strings to days since 1970-01-01
+    return np.array(days, dtype="datetime64[D]").astype(np.int64)
+
+
+# Load the rollups of a date range as column arrays
+@timed("analytics.load_sales_bins")
+def load_sales_bins(start=None, end=None):
+    """
+    Reads sales from start up to, but not including, end already binned: per
+    day and item from daily_item_totals, and per day and hour from
+    hourly_totals. Both rollups are kept at checkout and cover archived days,
+    so a year of sales is tens of thousands of rows rather than every line.
+    Days are counted from 1970-01-01, so the weekday comes straight out of
+    integer arithmetic.
+    Args:
+        start (str): Inclusive "YYYY-MM-DD" date, or None for no lower bound.
+        end (str): Exclusive "YYYY-MM-DD" date, or None for no upper bound.
+    Returns:
+        dict: "day", "item" (int64 codes into "names"), "quantity" and "total"
+        (int64 centavos) per day and item; "names" (array of item names); and
+        "hour_day", "hour" and "hour_total" per day and hour.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for sales analytics")
+
+    conn = get_connection(POS_DB)
+    where, params = range_clause("day", start, end)
+    rows = conn.execute(f"SELECT day, item_id, quantity, total_cents FROM daily_item_totals {where}",
+                        params).fetchall()
+    hours = conn.execute(f"SELECT day, hour, total_cents FROM hourly_totals {where}", params).fetchall()
+    days, item_ids, quantity, total = zip(*rows) if rows else ((), (), (), ())
+    hour_days, hour, hour_total = zip(*hours) if hours else ((), (), ())
+
+    # Factorize the integer item ids, then look up only the names of the items sold
+    item_ids, item = np.unique(np.array(item_ids, dtype=np.int64), return_inverse=True)
+    names_by_id = dict(conn.execute("SELECT id, name FROM items"))
+    return {
+        "day": _day_numbers(days),
+        "item": item.astype(np.int64),
+        "names": np.array([names_by_id.get(int(item_id), "") for item_id in item_ids], dtype=str),
+        "quantity": np.array(quantity, dtype=np.int64),
+        "total": np.array(total, dtype=np.int64),
+        "hour_day": _day_numbers(hour_days),
+        "hour": np.array(hour, dtype=np.int64),
+        "hour_total": np.array(hour_total, dtype=np.int64),
+    }
+
+
+# Rank items by revenue
+def top_items(data, n=10):
+    """
+    Returns the n best-selling items by revenue.
+    Returns:
+        list of tuple: (item_name, quantity, total in pesos), best first.
+    """
+    item_count = len(data["names"])
+    if item_count == 0:
+        return []
+    revenue = np.bincount(data["item"], weights=data["total"], minlength=item_count)
+    quantity = np.bincount(data["item"], weights=data["quantity"], minlength=item_count)
+    best = np.argsort(revenue)[::-1][:n]
+    return [(str(data["names"][i]), int(quantity[i]), float(revenue[i]) / 100) for i in best]
+
+
+# Revenue by weekday and hour of day
+def revenue_heatmap(data):
+    """
+    Returns revenue in pesos per (weekday, hour) as a 7 x 24 array, Monday first.
+    """
+    # 1970-01-01 was a Thursday, which is weekday 3 counting from Monday
+    weekdays = (data["hour_day"] + 3) % 7
+    cells = np.bincount(weekdays * 24 + data["hour"], weights=data["hour_total"], minlength=7 * 24)
+    return cells.reshape(7, 24) / 100
+
+
+# Revenue per day across the range
+def daily_trend(data):
+    """
+    Returns revenue for every day from the first to the last sale, with the
+    change from the day before.
+    Returns:
+        list of tuple: (day as "YYYY-MM-DD", revenue, change from previous day);
+        the change is None on the first day, which has no day before it.
+    """
+    if len(data["day"]) == 0:
+        return []
+    days = data["day"]
+    first = days.min()
+    revenue = np.bincount(days - first, weights=data["total"]) / 100
+    change = [None] + np.diff(revenue).tolist()
+    labels = (np.arange(len(revenue)) + first).astype("datetime64[D]").astype(str)
+    return [(str(label), float(amount), delta) for label, amount, delta in zip(labels, revenue, change)]
+
+
+# Run every analysis over a date range
+@timed("analytics.compute_analytics")
+def compute_analytics(start=None, end=None, top_n=10):
+    """
+    Loads the rollups of a date range once and computes every report from them.
+    Returns:
+        dict: "top_items", "by_hour" (24 revenues), "by_weekday" (7 revenues,
+        Monday first), "heatmap" (7 x 24 revenues) and "daily_trend".
+    """
+    data = load_sales_bins(start, end)
+    heatmap = revenue_heatmap(data)
+    return {
+        "top_items": top_items(data, top_n),
+        "by_hour": heatmap.sum(axis=0).tolist(),
+        "by_weekday": heatmap.sum(axis=1).tolist(),
+        "heatmap": heatmap.tolist(),
+        "daily_trend": daily_trend(data),
+    }
@@ -0,0 +1,120 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QDateEdit, QPushButton, QTabWidget, QTableWidget,
+    QTableWidgetItem, QMessageBox
+)
+from PyQt6.QtCore import Qt, QDate, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QColor
+from analytics import WEEKDAYS, compute_analytics, is_available
+
+
+class AnalyticsSignals(QObject):
+    finished = pyqtSignal(dict)  # compute_analytics' report
+    failed = pyqtSignal(str)
+
+
+class AnalyticsTask(QRunnable):
+    """Runs compute_analytics on the global thread pool so the dialog stays responsive."""
+
+    def __init__(self, start, end):
+        super().__init__()
+        self.start = start
+        self.end = end
+        self.signals = AnalyticsSignals()
+
+    def run(self):
+        try:
+            report = compute_analytics(self.start, self.end)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(report)
+
+
+class SalesAnalyticsDialog(QDialog):
+    """Top sellers, an hour-by-weekday revenue heatmap and the daily trend for a date range."""
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Sales Analytics")
+        self.resize(1000, 600)
+
+        layout = QVBoxLayout()
+
+        # Date range selection; the end date is included
+        range_row = QHBoxLayout()
+        range_row.addWidget(QLabel("From:"))
+        self.start_input = QDateEdit(QDate.currentDate().addDays(-29))
+        self.start_input.setCalendarPopup(True)
+        range_row.addWidget(self.start_input)
+        range_row.addWidget(QLabel("To:"))
+        self.end_input = QDateEdit(QDate.currentDate())
+        self.end_input.setCalendarPopup(True)
+        range_row.addWidget(self.end_input)
+        self.run_button = QPushButton("Run")
+        self.run_button.clicked.connect(self.run)
+        range_row.addWidget(self.run_button)
+        layout.addLayout(range_row)
+
+        self.tabs = QTabWidget()
+        self.top_table = QTableWidget(0, 3)
+        self.top_table.setHorizontalHeaderLabels(["Item Name", "Quantity", "Revenue"])
+        self.top_table.horizontalHeader().setStretchLastSection(True)
+        self.tabs.addTab(self.top_table, "Top Items")
+
+        self.heatmap_table = QTableWidget(7, 24)
+        self.heatmap_table.setVerticalHeaderLabels(WEEKDAYS)
+        self.heatmap_table.setHorizontalHeaderLabels([f"{hour:02d}" for hour in range(24)])
+        self.tabs.addTab(self.heatmap_table, "Hourly Heatmap")
+
+        self.trend_table = QTableWidget(0, 3)
+        self.trend_table.setHorizontalHeaderLabels(["Date", "Revenue", "Change"])
+        self.trend_table.horizontalHeader().setStretchLastSection(True)
+        self.tabs.addTab(self.trend_table, "Daily Trend")
+        layout.addWidget(self.tabs)
+
+        self.setLayout(layout)
+
+    def run(self):
+        """Computes every report for the selected range in the background."""
+        if not is_available():
+            QMessageBox.warning(self, "Unavailable", "Sales analytics needs NumPy to be installed.")
+            return
+
+        start = self.start_input.date().toString("yyyy-MM-dd")
+        end = self.end_input.date().addDays(1).toString("yyyy-MM-dd")
+        task = AnalyticsTask(start, end)
+        task.signals.finished.connect(self.show_report)
+        task.signals.failed.connect(self.run_failed)
+        self.run_button.setEnabled(False)
+        self.run_button.setText("Running...")
+        QThreadPool.globalInstance().start(task)
+
+    def run_failed(self, message):
+        self.run_button.setEnabled(True)
+        self.run_button.setText("Run")
+        QMessageBox.critical(self, "Error", f"Failed to compute sales analytics: {message}")
+
+    def show_report(self, report):
+        """Fills the tabs with a report from compute_analytics."""
+        self.run_button.setEnabled(True)
+        self.run_button.setText("Run")
+        self.top_table.setRowCount(len(report["top_items"]))
+        for row, (name, quantity, revenue) in enumerate(report["top_items"]):
+            self.top_table.setItem(row, 0, QTableWidgetItem(name))
+            self.top_table.setItem(row, 1, QTableWidgetItem(str(quantity)))
+            self.top_table.setItem(row, 2, QTableWidgetItem(f"₱{revenue:.2f}"))
+
+        # Shade each cell by its share of the busiest hour
+        peak = max((max(day) for day in report["heatmap"]), default=0) or 1
+        for weekday, hours in enumerate(report["heatmap"]):
+            for hour, revenue in enumerate(hours):
+                item = QTableWidgetItem(f"{revenue:.0f}" if revenue else "")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                item.setBackground(QColor(50, 205, 50, int(200 * revenue / peak)))
+                self.heatmap_table.setItem(weekday, hour, item)
+
+        self.trend_table.setRowCount(len(report["daily_trend"]))
+        for row, (day, revenue, change) in enumerate(report["daily_trend"]):
+            self.trend_table.setItem(row, 0, QTableWidgetItem(day))
+            self.trend_table.setItem(row, 1, QTableWidgetItem(f"₱{revenue:.2f}"))
+            self.trend_table.setItem(row, 2, QTableWidgetItem("" if change is None else f"{change:+.2f}"))
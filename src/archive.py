@@ -0,0 +1,284 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import date, timedelta
+from db import POS_DB, db_path, get_connection, transaction
+from inventory_db import get_archived_before
+from perf import timed
+from replication import get_shipped_through, is_configured as replication_configured
+
+# Directory, inside the data directory, holding the monthly archive files
+ARCHIVE_DIR = "archive"
+
+# Sales older than this many days are moved out of the live database;
+# PASTILAN_ARCHIVE_DAYS overrides it and 0 turns automatic archiving off
+ARCHIVE_AFTER_DAYS = int(os.environ.get("PASTILAN_ARCHIVE_DAYS", "90"))
+
+# Shape of the archive files, stored in their PRAGMA user_version; files from
+# before the unified schema are 0 and are converted by upgrade_archives
+ARCHIVE_SCHEMA_VERSION = 1
+
+_ARCHIVE_NAME = re.compile(r"^sales-(\d{4})-(\d{2})\.db$")
+
+
+# Work out the archive file of a month
+def archive_path(month):
+    """
+    Returns the path of the archive file of a month.
+    Args:
+        month (str): Month as "YYYY-MM".
+    """
+    return os.path.join(db_path(ARCHIVE_DIR), f"sales-{month}.db")
+
+
+# List the months that have an archive file
+def archived_months():
+    """Returns the "YYYY-MM" months with an archive file, oldest first."""
+    folder = db_path(ARCHIVE_DIR)
+    if not os.path.isdir(folder):
+        return []
+    months = []
+    for file_name in os.listdir(folder):
+        match = _ARCHIVE_NAME.match(file_name)
+        if match:
+            months.append(f"{match.group(1)}-{match.group(2)}")
+    return sorted(months)
+
+
+# Pick the archive months that overlap a date range
+def archived_months_between(start, end, conn=None):
+    """
+    Returns the archived months holding sales from start up to, but not
+    including, end. Costs one small query when the range is newer than
+    anything archived.
+    Args:
+        start (str): Inclusive "YYYY-MM-DD" date, or None for no lower bound.
+        end (str): Exclusive "YYYY-MM-DD" date, or None for no upper bound.
+    """
+    archived_before = get_archived_before(conn)
+    if archived_before is None or (start is not None and start >= archived_before):
+        return []
+    return [month for month in archived_months()
+            if (start is None or month >= start[:7]) and (end is None or f"{month}-01" < end)]
+
+
+# Sum the archived sales per hour
+def archived_hourly_totals():
+    """
+    Reads the revenue of every hour with sales from the archive files, for
+    filling hourly_totals for days whose sales have left the live database.
+    Returns:
+        list of tuple: (day as "YYYY-MM-DD", hour, total_cents), oldest first.
+    """
+    totals = {}
+    for month in archived_months():
+        uri = f"file:{os.path.abspath(archive_path(month))}?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as conn:
+            # Files upgrade_archives has not converted yet still hold pesos
+            if conn.execute("PRAGMA user_version").fetchone()[0] < ARCHIVE_SCHEMA_VERSION:
+                amount = "CAST(round(total * 100) AS INTEGER)"
+            else:
+                amount = "total_cents"
+            for day, hour, cents in conn.execute(f'''SELECT substr(date, 1, 10), CAST(substr(date, 12, 2) AS INTEGER),
+                                                          SUM({amount})
+                                                   FROM sales GROUP BY 1, 2'''):
+                totals[day, hour] = totals.get((day, hour), 0) + cents
+    return [(day, hour, cents) for (day, hour), cents in sorted(totals.items())]
+
+
+def _create_archive_tables(cursor, schema):
+    # The archive keeps the live ledger's shape and ids, with the date index.
+    # Item ids refer to the items table of the live database.
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.sales (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            uid TEXT
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.sale_lines (
+            id INTEGER PRIMARY KEY,
+            sale_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            price_cents INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_date ON sales(date)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sale_lines_sale_id ON sale_lines(sale_id)")
+    cursor.execute(f"PRAGMA {schema}.user_version = {ARCHIVE_SCHEMA_VERSION}")
+
+
+def _next_month(month):
+    return (date.fromisoformat(f"{month}-01") + timedelta(days=32)).strftime("%Y-%m")
+
+
+# Move old sales into monthly archive files
+@timed("archive.archive_sales")
+def archive_sales(older_than_days=ARCHIVE_AFTER_DAYS, today=None):
+    """
+    Moves every sale older than older_than_days out of the live database into
+    one archive file per month, then hands the freed pages back to the file
+    system. Each month is copied and committed before it is deleted from the
+    live database, and copying skips rows already in the archive, so an
+    interrupted run is completed by running it again. When replication is set
+    up, sales not yet shipped to the central store stay behind until they are.
+    The daily rollup stays
+    in the live database, so reports over archived days still read it directly.
+    Args:
+        older_than_days (int): Age in days after which a sale is archived.
+        today (date): Reference day; defaults to today.
+    Returns:
+        list of str: The "YYYY-MM" months that received sales.
+    """
+    cutoff = ((today or date.today()) - timedelta(days=older_than_days)).isoformat()
+    conn = get_connection(POS_DB)
+    # With replication on, only sales the central store already holds may leave
+    shipped = get_shipped_through(conn) if replication_configured() else None
+    id_limit = "" if shipped is None else f"AND id <= {int(shipped)}"
+    months = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT substr(date, 1, 7) FROM sales WHERE date < ? {id_limit} ORDER BY 1", (cutoff,))]
+    if not months:
+        return []
+
+    os.makedirs(db_path(ARCHIVE_DIR), exist_ok=True)
+    for month in months:
+        low = f"{month}-01"
+        high = min(f"{_next_month(month)}-01", cutoff)
+        conn.execute("ATTACH DATABASE ? AS archive_target", (archive_path(month),))
+        try:
+            with transaction(POS_DB) as cursor:
+                _create_archive_tables(cursor, "archive_target")
+                cursor.execute(f'''INSERT OR IGNORE INTO archive_target.sales
+                                  SELECT id, date, total_cents, uid FROM sales WHERE date >= ? AND date < ? {id_limit}''',
+                               (low, high))
+                cursor.execute(f'''INSERT OR IGNORE INTO archive_target.sale_lines
+                                  SELECT l.id, l.sale_id, l.item_id, l.quantity, l.price_cents, l.total_cents
+                                  FROM sales s JOIN sale_lines l ON l.sale_id = s.id
+                                  WHERE s.date >= ? AND s.date < ? {id_limit.replace("id", "s.id")}''',
+                               (low, high))
+        finally:
+            conn.execute("DETACH DATABASE archive_target")
+
+        with transaction(POS_DB) as cursor:
+            cursor.execute(f'''DELETE FROM sale_lines WHERE sale_id IN
+                              (SELECT id FROM sales WHERE date >= ? AND date < ? {id_limit})''', (low, high))
+            cursor.execute(f"DELETE FROM sales WHERE date >= ? AND date < ? {id_limit}", (low, high))
+            cursor.execute('''INSERT INTO archive_state (id, archived_before) VALUES (1, ?)
+                              ON CONFLICT (id) DO UPDATE SET
+                                  archived_before = max(archived_before, excluded.archived_before)''',
+                           (high,))
+
+    compact()
+    return months
+
+
+# Give the pages freed by archiving back to the file system
+def compact():
+    """
+    Shrinks the live database after rows were removed. A database created
+    before incremental vacuum was enabled is converted with one full VACUUM;
+    after that each run only releases the free pages.
+    """
+    conn = get_connection(POS_DB)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+
+# Convert archive files written before the unified schema
+def upgrade_archives():
+    """
+    Rewrites archive files from before the unified schema, which stored item
+    names and amounts in pesos, to item ids and centavos. Item names missing
+    from the live database are added as deleted items. Each file is converted
+    in one transaction and marked with ARCHIVE_SCHEMA_VERSION, so files already
+    converted are skipped.
+    """
+    conn = get_connection(POS_DB)
+    for month in archived_months():
+        conn.execute("ATTACH DATABASE ? AS archive_upgrade", (archive_path(month),))
+        try:
+            if conn.execute("PRAGMA archive_upgrade.user_version").fetchone()[0] >= ARCHIVE_SCHEMA_VERSION:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            try:
+                _upgrade_archive(cursor)
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                cursor.close()
+        finally:
+            conn.execute("DETACH DATABASE archive_upgrade")
+
+
+def _upgrade_archive(cursor):
+    cursor.execute('''INSERT INTO items (name, price_cents, deleted)
+                      SELECT item_name, CAST(round(price * 100) AS INTEGER), 1 FROM (
+                          SELECT item_name, price, MAX(id) FROM archive_upgrade.sale_lines GROUP BY item_name
+                      )
+                      WHERE item_name NOT IN (SELECT name FROM items)''')
+    for table in ("sales", "sale_lines"):
+        cursor.execute(f"ALTER TABLE archive_upgrade.{table} RENAME TO legacy_{table}")
+    cursor.execute("DROP INDEX archive_upgrade.idx_sales_date")
+    cursor.execute("DROP INDEX archive_upgrade.idx_sale_lines_sale_id")
+    _create_archive_tables(cursor, "archive_upgrade")
+
+    # A sale's total becomes the sum of its rounded lines, as in the live database
+    cursor.execute('''INSERT INTO archive_upgrade.sales (id, date, total_cents, uid)
+                      SELECT s.id, s.date, COALESCE(t.cents, CAST(round(s.total * 100) AS INTEGER)), s.uid
+                      FROM archive_upgrade.legacy_sales s LEFT JOIN (
+                          SELECT sale_id, SUM(CAST(round(total * 100) AS INTEGER)) AS cents
+                          FROM archive_upgrade.legacy_sale_lines GROUP BY sale_id
+                      ) t ON t.sale_id = s.id''')
+    cursor.execute('''INSERT INTO archive_upgrade.sale_lines (id, sale_id, item_id, quantity, price_cents, total_cents)
+                      SELECT l.id, l.sale_id, m.id, l.quantity,
+                             CAST(round(l.price * 100) AS INTEGER), CAST(round(l.total * 100) AS INTEGER)
+                      FROM archive_upgrade.legacy_sale_lines l
+                      JOIN (SELECT name, MIN(id) AS id FROM main.items GROUP BY name) m ON m.name = l.item_name''')
+    cursor.execute("DROP TABLE archive_upgrade.legacy_sale_lines")
+    cursor.execute("DROP TABLE archive_upgrade.legacy_sales")
+
+
+# Make archive months readable through a connection
+def attach_archives(conn, months):
+    """
+    Attaches the archive files of the given months to conn, reusing ones that
+    are already attached.
+    Returns:
+        list of str: Schema name of each month's archive, in the order given.
+    Raises:
+        sqlite3.OperationalError: If conn cannot attach that many databases.
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    schemas = []
+    for month in months:
+        schema = f"archive_{month.replace('-', '_')}"
+        if schema not in attached:
+            conn.execute("ATTACH DATABASE ? AS " + schema, (archive_path(month),))
+            attached.add(schema)
+        schemas.append(schema)
+    return schemas
+
+
+def open_archive_reader(months):
+    """
+    Opens a separate read connection to the live database with the given
+    archive months attached, for ranges that need more archives than the
+    thread's shared connection has room for.
+    Returns:
+        tuple: (connection, schema names)
+    """
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path(POS_DB))}?mode=ro", uri=True)
+    return conn, attach_archives(conn, months)
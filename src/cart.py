@@ -0,0 +1,132 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+
+# Convert a peso amount to integer centavos
+def to_cents(amount):
+    """
+    Converts a peso amount to an exact number of centavos.
+    Args:
+        amount (float or str or Decimal): Amount in pesos.
+    Returns:
+        int: Amount in centavos, rounded half up.
+    """
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+# Format integer centavos for display
+def format_peso(cents):
+    """
+    Formats centavos the way the register displays money, e.g. 1250 -> "₱12.50".
+    Args:
+        cents (int): Amount in centavos.
+    Returns:
+        str: The formatted amount.
+    """
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}₱{cents // 100}.{cents % 100:02d}"
+
+
+class CartLine:
+    """One item on the current order."""
+
+    __slots__ = ("item_id", "name", "price_cents", "quantity", "row")
+
+    def __init__(self, item_id, name, price_cents, row):
+        self.item_id = item_id
+        self.name = name
+        self.price_cents = price_cents
+        self.quantity = 0
+        self.row = row
+
+    @property
+    def total_cents(self):
+        return self.price_cents * self.quantity
+
+
+class Cart:
+    """
+    The order being rung up. Lines are kept in the order they were added and
+    indexed by item id, and the order total is kept as a running sum, so
+    adding or subtracting an item costs the same however long the order is.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self._by_id = {}
+        self.total_cents = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def get(self, item_id):
+        """Returns the line for an item, or None if it is not on the order."""
+        return self._by_id.get(item_id)
+
+    def add(self, item_id, name, price_cents, quantity=1):
+        """
+        Adds an item to the order, starting a new line if it is not on it yet.
+        Args:
+            item_id (int): Menu item id.
+            name (str): Item name, as shown on the order.
+            price_cents (int): Unit price in centavos. Ignored if the item is
+                already on the order: the line keeps the price it was rung up at.
+            quantity (int): Number of units to add.
+        Returns:
+            tuple: (line, created) where created is True if a new line was started.
+        """
+        line = self._by_id.get(item_id)
+        created = line is None
+        if created:
+            line = CartLine(item_id, name, price_cents, len(self.lines))
+            self.lines.append(line)
+            self._by_id[item_id] = line
+        # Move the total by what the line adds, so it always equals the sum of the lines
+        self.total_cents += line.price_cents * quantity
+        line.quantity += quantity
+        return line, created
+
+    def subtract(self, item_id):
+        """
+        Takes one unit of an item off the order, dropping its line at zero.
+        Args:
+            item_id (int): Menu item id.
+        Returns:
+            tuple or None: (line, removed) where removed is True if the line was
+            dropped, or None if the item is not on the order.
+        """
+        line = self._by_id.get(item_id)
+        if line is None:
+            return None
+        line.quantity -= 1
+        self.total_cents -= line.price_cents
+        if line.quantity > 0:
+            return line, False
+
+        del self._by_id[item_id]
+        del self.lines[line.row]
+        for later in self.lines[line.row:]:
+            later.row -= 1
+        return line, True
+
+    def clear(self):
+        """Empties the order."""
+        self.lines.clear()
+        self._by_id.clear()
+        self.total_cents = 0
+
+    def sale_lines(self):
+        """
+        Returns the order as rows ready to record as a sale.
+        Returns:
+            list of tuple: (item_id, quantity, price_cents, total_cents) per line.
+        """
+        return [(line.item_id, line.quantity, line.price_cents, line.total_cents) for line in self.lines]
+
+    def receipt_lines(self):
+        """
+        Returns the order as rows ready to print.
+        Returns:
+            list of tuple: (name, quantity, price_cents, total_cents) per line.
+        """
+        return [(line.name, line.quantity, line.price_cents, line.total_cents) for line in self.lines]
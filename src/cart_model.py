@@ -0,0 +1,83 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from cart import Cart, format_peso
+
+CART_COLUMNS = ["Item", "Qty", "Price", "Total", "Actions"]
+
+
+class CartTableModel(QAbstractTableModel):
+    """
+    Exposes a Cart to the order summary table. Every change is reported as a
+    single-row insert, update or removal, so the view never re-reads the whole
+    order.
+    """
+
+    # Emitted with the new order total, in centavos, after every change
+    total_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cart = Cart()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cart)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CART_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return CART_COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        line = self.cart.lines[index.row()]
+        column = index.column()
+        if column == 0:
+            return line.name
+        if column == 1:
+            return str(line.quantity)
+        if column == 2:
+            return format_peso(line.price_cents)
+        if column == 3:
+            return format_peso(line.total_cents)
+        return None
+
+    def add_item(self, item_id, name, price_cents):
+        """Adds one unit of an item to the order."""
+        line = self.cart.get(item_id)
+        if line is None:
+            row = len(self.cart)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.cart.add(item_id, name, price_cents)
+            self.endInsertRows()
+        else:
+            self.cart.add(item_id, name, price_cents)
+            self._line_changed(line)
+        self.total_changed.emit(self.cart.total_cents)
+
+    def subtract_item(self, item_id):
+        """Takes one unit of an item off the order, removing its row at zero."""
+        line = self.cart.get(item_id)
+        if line is None:
+            return
+        if line.quantity > 1:
+            self.cart.subtract(item_id)
+            self._line_changed(line)
+        else:
+            row = line.row
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.cart.subtract(item_id)
+            self.endRemoveRows()
+        self.total_changed.emit(self.cart.total_cents)
+
+    def clear(self):
+        """Empties the order."""
+        self.beginResetModel()
+        self.cart.clear()
+        self.endResetModel()
+        self.total_changed.emit(self.cart.total_cents)
+
+    def _line_changed(self, line):
+        self.dataChanged.emit(self.index(line.row, 1), self.index(line.row, 3))
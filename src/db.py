@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import perf
+
+# Database file name, resolved against the data directory. The menu and the
+# sale ledger share one file so sale lines can reference items by id.
+POS_DB = "pos.db"
+
+# Number of prepared statements each connection keeps compiled
+STATEMENT_CACHE_SIZE = 256
+
+_data_dir = None
+_generation = 0
+_local = threading.local()
+
+
+# Point the connection layer at a different data directory
+def set_data_dir(path):
+    """
+    Changes the directory the database files are opened from.
+    Connections opened before the change are closed on their next use.
+    Args:
+        path (str or None): Directory holding the database files, or None for the working directory.
+    """
+    global _data_dir, _generation
+    close_connections()
+    _data_dir = os.path.abspath(path) if path else None
+    _generation += 1
+
+
+# Find out which data directory is in use
+def get_data_dir():
+    """Returns the directory set by set_data_dir, or None for the working directory."""
+    return _data_dir
+
+
+# Resolve a database name to the file it lives in
+def db_path(name):
+    """
+    Returns the path of a database file inside the data directory.
+    Args:
+        name (str): Database file name, e.g. POS_DB.
+    Returns:
+        str: Path of the database file.
+    """
+    if _data_dir is None:
+        return name
+    return os.path.join(_data_dir, name)
+
+
+def _configure(conn):
+    # Incremental vacuum lets archiving hand freed pages back without a full
+    # VACUUM; it can only be chosen while the file is empty and before WAL is on
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets readers run alongside the writer and turns each commit into an append
+    conn.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only syncs at checkpoints and stays safe against corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Negative cache_size is in KiB: keep about 8 MiB of pages in memory
+    conn.execute("PRAGMA cache_size=-8192")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+    perf.attach_connection(conn)
+
+
+# Get the calling thread's connection to a database
+def get_connection(name):
+    """
+    Returns the persistent connection the current thread holds for a database,
+    opening and configuring it on first use.
+    Args:
+        name (str): Database file name, e.g. POS_DB.
+    Returns:
+        sqlite3.Connection: Connection owned by the current thread.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _generation:
+        if connections:
+            for conn in connections.values():
+                conn.close()
+        connections = _local.connections = {}
+        _local.generation = _generation
+
+    conn = connections.get(name)
+    if conn is None:
+        conn = sqlite3.connect(db_path(name), cached_statements=STATEMENT_CACHE_SIZE)
+        _configure(conn)
+        connections[name] = conn
+    return conn
+
+
+# Run a block of statements as one transaction
+@contextmanager
+def transaction(name):
+    """
+    Yields a cursor on the thread's connection and commits when the block
+    exits, or rolls back if it raises.
+    Args:
+        name (str): Database file name, e.g. POS_DB.
+    """
+    conn = get_connection(name)
+    cursor = conn.cursor()
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+# Close the connections held by the calling thread
+def close_connections():
+    """Closes every connection the current thread has open."""
+    connections = getattr(_local, "connections", None)
+    if connections:
+        for conn in connections.values():
+            conn.close()
+        connections.clear()
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+from db import db_path
+
+# Edge length, in pixels, of product grid thumbnails
+THUMBNAIL_SIZE = 150
+
+# Directory, inside the data directory, holding generated thumbnails
+THUMBNAIL_DIR = "thumbnails"
+
+# Number of scaled pixmaps kept in memory
+PIXMAP_CACHE_SIZE = 512
+
+
+def _source_stamp(path):
+    # Identify a source file by where it is, when it last changed and how big it is
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+# Work out where the thumbnail of an image is stored on disk
+def thumbnail_path(path, size=THUMBNAIL_SIZE):
+    """
+    Returns the on-disk cache path of an image's thumbnail. The name is derived
+    from the source path, modification time and file size, so an edited source
+    gets a fresh thumbnail.
+    Args:
+        path (str): Source image path.
+        size (int): Thumbnail edge length in pixels.
+    Returns:
+        str: Path of the cached thumbnail (which may not exist yet).
+    """
+    source, mtime, file_size = _source_stamp(path)
+    key = hashlib.sha1(f"{source}|{mtime}|{file_size}|{size}".encode("utf-8")).hexdigest()
+    return os.path.join(db_path(THUMBNAIL_DIR), f"{key}.png")
+
+
+# Decode an image at (close to) the requested size
+def load_scaled_image(path, size):
+    """
+    Decodes an image scaled to fit within size x size. The reader is asked for
+    the reduced size up front, so JPEG photos are decoded at a fraction of their
+    full resolution. Uses QImage only, so it is safe off the GUI thread.
+    Args:
+        path (str): Source image path.
+        size (int): Bounding edge length in pixels.
+    Returns:
+        QImage: The scaled image, or a null QImage if it cannot be read.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        reader.setScaledSize(original.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return QImage()
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+# Make sure an image has a thumbnail in the on-disk cache
+def ensure_thumbnail(path, size=THUMBNAIL_SIZE):
+    """
+    Creates the cached thumbnail of an image if it does not exist yet.
+    Safe to call from worker threads.
+    Args:
+        path (str): Source image path.
+        size (int): Thumbnail edge length in pixels.
+    Returns:
+        str or None: Path of the thumbnail, or None if the source cannot be read.
+    """
+    try:
+        target = thumbnail_path(path, size)
+    except OSError:
+        return None
+    if os.path.exists(target):
+        return target
+
+    image = load_scaled_image(path, size)
+    if image.isNull():
+        return None
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write under a temporary name first so readers never see a partial file
+    temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if not image.save(temporary, "PNG"):
+        return None
+    os.replace(temporary, target)
+    return target
+
+
+class PixmapCache:
+    """
+    Two-level cache of grid-sized pixmaps: an in-memory LRU of scaled QPixmaps
+    in front of the on-disk thumbnail cache. Must be used from the GUI thread.
+    """
+
+    def __init__(self, placeholder_path, size=THUMBNAIL_SIZE, max_entries=PIXMAP_CACHE_SIZE):
+        self.placeholder_path = placeholder_path
+        self.size = size
+        self.max_entries = max_entries
+        self._pixmaps = OrderedDict()
+        self._placeholder = None
+
+    def placeholder(self):
+        """Returns the scaled no-image pixmap, decoding it only once."""
+        if self._placeholder is None:
+            self._placeholder = self._load(self.placeholder_path) or QPixmap()
+        return self._placeholder
+
+    def get(self, path):
+        """
+        Returns the scaled pixmap of an image, or the placeholder if it is
+        missing or unreadable.
+        Args:
+            path (str or None): Source image path.
+        Returns:
+            QPixmap: Pixmap fitting within the cache's thumbnail size.
+        """
+        if not path:
+            return self.placeholder()
+        try:
+            key = _source_stamp(path)
+        except OSError:
+            return self.placeholder()
+
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        pixmap = self._load(path)
+        if pixmap is None:
+            return self.placeholder()
+
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.max_entries:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear(self):
+        """Drops every pixmap held in memory."""
+        self._pixmaps.clear()
+        self._placeholder = None
+
+    def _load(self, path):
+        thumbnail = ensure_thumbnail(path, self.size)
+        if thumbnail is None:
+            return None
+        pixmap = QPixmap(thumbnail)
+        return None if pixmap.isNull() else pixmap
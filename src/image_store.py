@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+import time
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+from db import db_path
+from image_cache import ensure_thumbnail, load_scaled_image, thumbnail_path
+from perf import timed
+
+# Directory, inside the data directory, holding uploaded menu images
+IMAGE_DIR = "images"
+
+# Longest edge, in pixels, an uploaded image is stored at
+MAX_IMAGE_SIZE = 1024
+
+# Quality of stored JPEG images, 0-100
+JPEG_QUALITY = 85
+
+# Unreferenced images younger than this are kept, as they may belong to an
+# upload whose menu item has not been added yet
+PRUNE_GRACE_SECONDS = 24 * 60 * 60
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _content_hash(path):
+    # Hash the uploaded file itself, so the same picture maps to the same name
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _stored_name(path, key):
+    # Photos are stored as JPEG; formats that may carry transparency stay PNG
+    extension = os.path.splitext(path)[1].lower()
+    return f"{key}.png" if extension in (".png", ".gif", ".bmp") else f"{key}.jpg"
+
+
+# Copy an uploaded image into the image store
+@timed("image_store.store_image")
+def store_image(path):
+    """
+    Stores an uploaded image under the hash of its contents, downscaled to fit
+    within MAX_IMAGE_SIZE, and generates its grid thumbnail. Uploading the same
+    file again reuses the stored copy, and files with the same name no longer
+    overwrite each other. Uses QImage only, so it is safe off the GUI thread.
+    Args:
+        path (str): The file the user picked.
+    Returns:
+        str: Path of the stored image.
+    Raises:
+        OSError: If the file cannot be read or the stored copy cannot be written.
+        ValueError: If the file is not a readable image.
+    """
+    key = _content_hash(path)
+    folder = db_path(IMAGE_DIR)
+    target = os.path.join(folder, _stored_name(path, key))
+    try:
+        # Reusing a stored copy restarts its prune grace period, so an old
+        # unreferenced file picked again survives until the item is saved
+        os.utime(target)
+        reused = True
+    except FileNotFoundError:
+        reused = False
+    if not reused:
+        image = load_scaled_image(path, MAX_IMAGE_SIZE)
+        if image.isNull():
+            raise ValueError(f"{os.path.basename(path)} is not a readable image")
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        if target.endswith(".jpg"):
+            saved = image.save(buffer, "JPEG", JPEG_QUALITY)
+        else:
+            saved = image.save(buffer, "PNG")
+        buffer.close()
+        if not saved:
+            raise OSError(f"Could not encode {os.path.basename(path)}")
+
+        os.makedirs(folder, exist_ok=True)
+        # Write under a temporary name first so readers never see a partial file
+        temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as stored:
+            stored.write(data.data())
+        os.replace(temporary, target)
+
+    ensure_thumbnail(target)
+    return target
+
+
+# Delete stored images no menu item uses any more
+def prune_images(referenced_paths, grace_seconds=PRUNE_GRACE_SECONDS):
+    """
+    Removes images from the store that are not in referenced_paths, along with
+    their thumbnails, keeping recent ones that a pending upload may still be
+    about to use.
+    Args:
+        referenced_paths (iterable of str): Image paths of the current menu items.
+        grace_seconds (float): Minimum age of an image before it can be removed.
+    Returns:
+        int: Number of files removed.
+    """
+    folder = db_path(IMAGE_DIR)
+    if not os.path.isdir(folder):
+        return 0
+    referenced = {os.path.abspath(path) for path in referenced_paths if path}
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    for entry in os.scandir(folder):
+        if not entry.is_file() or os.path.abspath(entry.path) in referenced:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                thumbnail = thumbnail_path(entry.path)
+                if os.path.exists(thumbnail):
+                    os.remove(thumbnail)
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # Gone already or in use; the next prune retries
+    return removed
@@ -1,65 +1,183 @@
-import sqlite3
 from datetime import datetime
+from db import POS_DB, get_connection, transaction
+from menu_db import item_id_for_name
+from perf import timed
 
-# Create the database and table for storing orders
-def create_checkout_db():
-    conn = sqlite3.connect("inventory.db")
-    cursor = conn.cursor()
-
-    # Create a table for storing order details if it doesn't already exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            item_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            price REAL NOT NULL,
-            total REAL NOT NULL,
-            date TEXT NOT NULL
-        )
-    ''')
+def _insert_sale(cursor, lines, date, uid):
+    # Write one sale, its lines and its rollup rows; returns None if uid is already stored
+    sale_total = sum(line[3] for line in lines)
+    cursor.execute("INSERT OR IGNORE INTO sales (date, total_cents, uid) VALUES (?, ?, ?)", (date, sale_total, uid))
+    if cursor.rowcount == 0:
+        return None
+    sale_id = cursor.lastrowid
+    cursor.executemany('''INSERT INTO sale_lines (sale_id, item_id, quantity, price_cents, total_cents)
+                          VALUES (?, ?, ?, ?, ?)''',
+                       [(sale_id, *line) for line in lines])
+
+    # Fold the sale into the daily and hourly rollups in the same transaction
+    day = date[:10]
+    cursor.executemany('''INSERT INTO daily_item_totals (day, item_id, quantity, total_cents)
+                          VALUES (?, ?, ?, ?)
+                          ON CONFLICT (day, item_id) DO UPDATE SET
+                              quantity = quantity + excluded.quantity,
+                              total_cents = total_cents + excluded.total_cents''',
+                       [(day, line[0], line[1], line[3]) for line in lines])
+    cursor.execute('''INSERT INTO hourly_totals (day, hour, total_cents) VALUES (?, ?, ?)
+                      ON CONFLICT (day, hour) DO UPDATE SET total_cents = total_cents + excluded.total_cents''',
+                   (day, int(date[11:13]), sale_total))
+    return sale_id
+
+# Get the current date and time the way sales store it
+def sale_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    conn.commit()
-    conn.close()
+# Record a whole checkout in one transaction
+@timed("inventory_db.record_sale")
+def record_sale(lines, date=None, uid=None):
+    """
+    Appends one sale and all of its lines to the ledger in a single transaction.
+    Args:
+        lines (list of tuple): (item_id, quantity, price_cents, total_cents) for each item sold.
+        date (str): Sale time as "YYYY-MM-DD HH:MM:SS"; defaults to now.
+        uid (str): Unique id of the sale; a sale whose uid is already stored is skipped.
+    Returns:
+        int or None: Id of the new sale, or None if the uid was already stored.
+    """
+    with transaction(POS_DB) as cursor:
+        return _insert_sale(cursor, lines, date or sale_timestamp(), uid)
+
+# Record several checkouts in one transaction
+@timed("inventory_db.record_sales")
+def record_sales(sales):
+    """
+    Appends a batch of sales to the ledger in a single transaction.
+    Args:
+        sales (list of tuple): (lines, date, uid) for each sale, as taken by record_sale.
+    Returns:
+        list: Id of each new sale, or None where its uid was already stored.
+    """
+    with transaction(POS_DB) as cursor:
+        return [_insert_sale(cursor, lines, date or sale_timestamp(), uid) for lines, date, uid in sales]
 
 # Add an order to the database
-def add_order(item_name, quantity, price, total):
-    conn = sqlite3.connect("inventory.db")
-    cursor = conn.cursor()
-
-    # Get the current date and time
-    date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Check if the item already exists
-    cursor.execute('''SELECT id, quantity, total FROM orders WHERE item_name = ?''', (item_name,))
-    existing_order = cursor.fetchone()
-
-    if existing_order:
-        # If the item exists, update the quantity and total
-        existing_quantity = existing_order[1]
-        existing_total = existing_order[2]
-
-        new_quantity = existing_quantity + quantity
-        new_total = existing_total + total
-
-        cursor.execute('''UPDATE orders SET quantity = ?, total = ? WHERE id = ?''',
-                       (new_quantity, new_total, existing_order[0]))
-    else:
-        # If the item doesn't exist, insert a new order
-        cursor.execute('''INSERT INTO orders (item_name, quantity, price, total, date)
-                          VALUES (?, ?, ?, ?, ?)''',
-                       (item_name, quantity, price, total, date))
+@timed("inventory_db.add_order")
+def add_order(item_name, quantity, price_cents, total_cents):
+    """Records a single item, looked up by name, as a sale of its own."""
+    return record_sale([(item_id_for_name(item_name, price_cents), quantity, price_cents, total_cents)])
+
 
-    conn.commit()
-    conn.close()
+# Get the date before which sales live in archive files
+def get_archived_before(conn=None):
+    """
+    Returns the "YYYY-MM-DD" date before which sales have been moved out of the
+    live database by archive_sales, or None if nothing has been archived.
+    """
+    conn = conn or get_connection(POS_DB)
+    row = conn.execute("SELECT archived_before FROM archive_state WHERE id = 1").fetchone()
+    return row[0] if row else None
 
+# Aggregate the raw sale lines the way daily_item_totals stores them. Archived
+# days have no raw lines left here, so their rollup rows are kept as they are.
+_DAILY_TOTALS_QUERY = '''
+    SELECT substr(s.date, 1, 10), l.item_id, SUM(l.quantity), SUM(l.total_cents)
+    FROM sales s JOIN sale_lines l ON l.sale_id = s.id
+    WHERE s.date >= ?
+    GROUP BY 1, 2
+'''
 
-# Retrieve all orders from the database, optionally sorted by date
-def get_all_orders():
-    conn = sqlite3.connect("inventory.db")
-    cursor = conn.cursor()
+def _rebuild_daily_totals(cursor):
+    archived_before = get_archived_before(cursor.connection) or ""
+    cursor.execute("DELETE FROM daily_item_totals WHERE day >= ?", (archived_before,))
+    cursor.execute("INSERT INTO daily_item_totals (day, item_id, quantity, total_cents) " + _DAILY_TOTALS_QUERY,
+                   (archived_before,))
 
-    cursor.execute("SELECT * FROM orders ORDER BY date DESC")
-    orders = cursor.fetchall()
+# Aggregate the raw sales the way hourly_totals stores them
+_HOURLY_TOTALS_QUERY = '''
+    SELECT substr(date, 1, 10), CAST(substr(date, 12, 2) AS INTEGER), SUM(total_cents)
+    FROM sales
+    WHERE date >= ?
+    GROUP BY 1, 2
+'''
 
-    conn.close()
-    return orders
+def _rebuild_hourly_totals(cursor):
+    archived_before = get_archived_before(cursor.connection) or ""
+    cursor.execute("DELETE FROM hourly_totals WHERE day >= ?", (archived_before,))
+    cursor.execute("INSERT INTO hourly_totals (day, hour, total_cents) " + _HOURLY_TOTALS_QUERY, (archived_before,))
+
+# Recompute the daily rollups from the raw sales
+def rebuild_daily_totals():
+    """
+    Discards daily_item_totals and hourly_totals and recomputes them from
+    sales and sale_lines. Days already archived keep their rollup rows.
+    """
+    with transaction(POS_DB) as cursor:
+        _rebuild_daily_totals(cursor)
+        _rebuild_hourly_totals(cursor)
+
+# Compare the daily rollup against the raw sales
+def verify_daily_totals():
+    """
+    Recomputes the daily rollup from the raw sales and compares it with the
+    stored rows. Days already archived are not checked.
+    Returns:
+        list of tuple: (day, item_id, stored_quantity, stored_total_cents, actual_quantity,
+        actual_total_cents) for every mismatch; an empty list means the rollup is correct.
+    """
+    conn = get_connection(POS_DB)
+    archived_before = get_archived_before(conn) or ""
+    actual = {(row[0], row[1]): (row[2], row[3]) for row in conn.execute(_DAILY_TOTALS_QUERY, (archived_before,))}
+    stored = {(row[0], row[1]): (row[2], row[3])
+              for row in conn.execute("SELECT day, item_id, quantity, total_cents FROM daily_item_totals WHERE day >= ?",
+                                      (archived_before,))}
+
+    mismatches = []
+    for key in sorted(actual.keys() | stored.keys()):
+        stored_quantity, stored_total = stored.get(key, (0, 0))
+        actual_quantity, actual_total = actual.get(key, (0, 0))
+        if stored_quantity != actual_quantity or stored_total != actual_total:
+            mismatches.append((*key, stored_quantity, stored_total, actual_quantity, actual_total))
+    return mismatches
+
+# Compare the hourly rollup against the raw sales
+def verify_hourly_totals():
+    """
+    Recomputes the hourly rollup from the raw sales and compares it with the
+    stored rows. Days already archived are not checked.
+    Returns:
+        list of tuple: (day, hour, stored_total_cents, actual_total_cents) for
+        every mismatch; an empty list means the rollup is correct.
+    """
+    conn = get_connection(POS_DB)
+    archived_before = get_archived_before(conn) or ""
+    actual = {(row[0], row[1]): row[2] for row in conn.execute(_HOURLY_TOTALS_QUERY, (archived_before,))}
+    stored = {(row[0], row[1]): row[2]
+              for row in conn.execute("SELECT day, hour, total_cents FROM hourly_totals WHERE day >= ?",
+                                      (archived_before,))}
+    return [(*key, stored.get(key, 0), actual.get(key, 0))
+            for key in sorted(actual.keys() | stored.keys()) if stored.get(key, 0) != actual.get(key, 0)]
+
+
+# Retrieve all orders from the database, newest first, a page at a time
+def get_all_orders(page_size=500):
+    """
+    Yields every order row in the live database, newest first, reading
+    page_size rows from the cursor at a time so the whole table is never held
+    in memory. Sales moved to archive files are not included.
+    """
+    # The rows of the orders view, read from sales so idx_sales_date yields
+    # them newest first; the date bound makes the planner use the index
+    # rather than sort the whole ledger before the first page
+    cursor = get_connection(POS_DB).execute('''
+        SELECT l.id, i.name, l.quantity, l.price_cents / 100.0, l.total_cents / 100.0, s.date
+        FROM sales s JOIN sale_lines l ON l.sale_id = s.id JOIN items i ON i.id = l.item_id
+        WHERE s.date >= ''
+        ORDER BY s.date DESC
+    ''')
+    try:
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
@@ -0,0 +1,129 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QCalendarWidget, QComboBox, QTableView, QPushButton, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from cart import format_peso
+from inventory_model import InventoryTableModel
+from inventory_viewer import PERIODS, get_period_range, get_total_between
+from perf import timed
+from sales_export import export_sales
+
+class ExportSignals(QObject):
+    finished = pyqtSignal(int, str)  # Lines written, file path
+    failed = pyqtSignal(str)
+
+
+class ExportTask(QRunnable):
+    """Runs export_sales on the global thread pool so the dialog stays responsive."""
+
+    def __init__(self, path, start, end):
+        super().__init__()
+        self.path = path
+        self.start = start
+        self.end = end
+        self.signals = ExportSignals()
+
+    def run(self):
+        try:
+            written = export_sales(self.path, self.start, self.end)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(written, self.path)
+
+
+class ViewInventoryDialog(QDialog):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("View Inventory")
+
+        self.resize(800, 600)
+
+        layout = QVBoxLayout()
+
+        # Add a label and calendar
+        self.date_label = QLabel("Select Date:")
+        layout.addWidget(self.date_label)
+
+        self.calendar = QCalendarWidget()
+        self.calendar.selectionChanged.connect(self.update_table)
+        layout.addWidget(self.calendar)
+
+        # Show the selected day, or the week or month around it
+        self.period_select = QComboBox()
+        self.period_select.addItems(PERIODS)
+        self.period_select.currentIndexChanged.connect(lambda: self.update_table())
+        layout.addWidget(self.period_select)
+
+        # Add a table view that pages inventory rows in as it scrolls
+        self.inventory_model = InventoryTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.inventory_model)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        # Release the open cursor once the dialog is closed
+        self.finished.connect(self.inventory_model.close)
+
+        # Add a label to show the total sum of the prices
+        self.total_label = QLabel("Total Amount: ₱0.00")
+        self.total_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.total_label)
+
+        # Export the rows of the selected period to a file
+        self.export_button = QPushButton("Export...")
+        self.export_button.clicked.connect(self.export)
+        layout.addWidget(self.export_button)
+
+        self.setLayout(layout)
+        self.update_table()  # Load the initial data
+
+    @timed("inventory_dialog.update_table")
+    def update_table(self):
+        """Updates the inventory table based on the selected date and period."""
+        selected_date = self.calendar.selectedDate().toString("yyyy-MM-dd")
+        start, end = get_period_range(selected_date, self.period_select.currentText())
+
+        # Point the table at the range; rows are read as they scroll into view.
+        # "All" is shown in ID order: sorting it by another column would sort
+        # the whole ledger, so header sorting is only on for bounded periods.
+        sortable = start is not None
+        if not sortable:
+            self.table.setSortingEnabled(False)
+        self.inventory_model.set_range(start, end)
+        if sortable and not self.table.isSortingEnabled():
+            self.table.setSortingEnabled(True)  # Re-applies the header's sort
+
+        # Read the total from the pre-aggregated daily rollup
+        total_cents = get_total_between(start, end)
+        self.total_label.setText(f"Total Amount: {format_peso(total_cents)}")
+
+    def export(self):
+        """Writes the selected period's sales to a CSV or JSON Lines file in the background."""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Sales", "sales.csv", "CSV Files (*.csv);;JSON Lines Files (*.jsonl)"
+        )
+        if not file_path:
+            return  # User canceled the dialog
+
+        selected_date = self.calendar.selectedDate().toString("yyyy-MM-dd")
+        start, end = get_period_range(selected_date, self.period_select.currentText())
+
+        task = ExportTask(file_path, start, end)
+        task.signals.finished.connect(self.export_finished)
+        task.signals.failed.connect(self.export_failed)
+        self.export_button.setEnabled(False)
+        self.export_button.setText("Exporting...")
+        QThreadPool.globalInstance().start(task)
+
+    def export_finished(self, written, file_path):
+        self.export_button.setEnabled(True)
+        self.export_button.setText("Export...")
+        QMessageBox.information(self, "Export Complete", f"{written} sale lines exported to {file_path}")
+
+    def export_failed(self, message):
+        self.export_button.setEnabled(True)
+        self.export_button.setText("Export...")
+        QMessageBox.critical(self, "Error", f"Failed to export sales: {message}")
@@ -0,0 +1,102 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from cart import format_peso
+from inventory_viewer import INVENTORY_COLUMNS, UNBOUNDED_SORT_COLUMNS, open_inventory_cursor
+from perf import timed
+
+# Rows pulled from the cursor each time the view scrolls near the end
+PAGE_SIZE = 200
+
+# Column holding an amount in centavos
+TOTAL_COLUMN = 3
+
+
+class InventoryTableModel(QAbstractTableModel):
+    """
+    Inventory rows for a date range, read lazily from a database cursor.
+    The view asks for more rows through canFetchMore/fetchMore as it scrolls,
+    so opening a long range only reads the first page. Sorting re-runs the
+    query with an ORDER BY instead of sorting in Python; an unbounded range is
+    only sorted by UNBOUNDED_SORT_COLUMNS and falls back to ID order otherwise.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.cursor = None
+        self.start = None
+        self.end = None
+        self.sort_column = 0
+        self.descending = False
+
+    def set_range(self, start, end):
+        """Shows the rows from start up to, but not including, end."""
+        self.start = start
+        self.end = end
+        self._reload()
+
+    def can_sort(self, column):
+        """Returns True if the current range can be sorted by column without sorting the whole ledger."""
+        return self.start is not None or column in UNBOUNDED_SORT_COLUMNS
+
+    def close(self):
+        """Drops the rows and releases the cursor."""
+        self.beginResetModel()
+        self._close_cursor()
+        self.rows = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(INVENTORY_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return INVENTORY_COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if index.column() == TOTAL_COLUMN:
+            return format_peso(value)
+        return str(value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.cursor is not None
+
+    @timed("inventory_model.fetchMore")
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.cursor is None:
+            return
+        page = self.cursor.fetchmany(PAGE_SIZE)
+        if len(page) < PAGE_SIZE:
+            self._close_cursor()
+        if page:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sort_column = column
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self._reload()
+
+    def _reload(self):
+        self.beginResetModel()
+        self._close_cursor()
+        self.rows = []
+        if self.can_sort(self.sort_column):
+            column, descending = self.sort_column, self.descending
+        else:
+            column, descending = 0, False
+        self.cursor = open_inventory_cursor(self.start, self.end, column, descending)
+        self.endResetModel()
+
+    def _close_cursor(self):
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
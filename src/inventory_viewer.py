@@ -1,5 +1,192 @@
+import heapq
+import itertools
 import sqlite3
+from datetime import date, timedelta
+from operator import itemgetter
+from archive import archived_months_between, attach_archives, open_archive_reader
+from db import POS_DB, get_connection
+from perf import timed
 
+# Periods the inventory viewer can show around a selected date
+PERIODS = ("Day", "Week", "Month", "All")
+
+# Columns of inventory rows, and the SQL each one sorts by
+INVENTORY_COLUMNS = ("ID", "Item Name", "Quantity", "Total Price")
+_INVENTORY_FIELDS = ["l.id", "i.name", "l.quantity", "l.total_cents"]
+
+# Columns an unbounded range can be sorted by: ID order comes straight off the
+# sale_lines primary key, while any other order sorts the whole ledger
+UNBOUNDED_SORT_COLUMNS = (0,)
+
+# Archive files a single connection attaches at once; SQLite allows 10 by default
+MAX_ATTACHED_ARCHIVES = 8
+
+
+def get_period_range(selected_date, period="Day"):
+    """
+    Compute the half-open date range covering the period around a date.
+    Weeks start on Monday; "All" is unbounded on both sides.
+
+    :param selected_date: Date string in "YYYY-MM-DD" format.
+    :param period: One of PERIODS.
+    :return: (start, end) date strings, end exclusive, or (None, None) for "All".
+    """
+    if period == "All":
+        return None, None
+    day = date.fromisoformat(selected_date)
+    if period == "Week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+    elif period == "Month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        start = day
+        end = day + timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def range_clause(column, start, end):
+    # Build a WHERE clause for a half-open range; a None bound is left open
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{column} < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+class MergedCursor:
+    """
+    Cursor-like reader over the same query run on several connections, for
+    date ranges that reach more archive months than one connection can attach.
+    Rows are merged in order when the query is ordered.
+    """
+
+    def __init__(self, cursors, readers, order, descending):
+        self.cursors = cursors
+        self.readers = readers
+        if order:
+            self.rows = heapq.merge(*cursors, key=itemgetter(*order), reverse=descending)
+        else:
+            self.rows = itertools.chain(*cursors)
+
+    def __iter__(self):
+        return self.rows
+
+    def fetchmany(self, size):
+        return list(itertools.islice(self.rows, size))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        for cursor in self.cursors:
+            cursor.close()
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+
+def _union_query(fields, schemas, where, order, descending):
+    # One SELECT per database, glued with UNION ALL and ordered by result position
+    select = ", ".join(fields)
+    # Archived lines refer to the live items table, so items always come from main
+    parts = [f"SELECT {select} FROM {schema}.sales s JOIN {schema}.sale_lines l ON l.sale_id = s.id "
+             f"JOIN main.items i ON i.id = l.item_id {where}"
+             for schema in schemas]
+    query = " UNION ALL ".join(parts)
+    if order:
+        direction = "DESC" if descending else "ASC"
+        query += " ORDER BY " + ", ".join(f"{position + 1} {direction}" for position in order)
+    return query
+
+
+def _detach_unused(conn, keep):
+    for row in conn.execute("PRAGMA database_list").fetchall():
+        if row[1].startswith("archive_") and row[1] not in keep:
+            try:
+                conn.execute(f"DETACH DATABASE {row[1]}")
+            except sqlite3.OperationalError:
+                pass  # Still read by an open cursor; it is detached on a later query
+
+
+def query_sale_lines(fields, start=None, end=None, order=None, descending=False):
+    """
+    Run a SELECT over sale lines joined to their sales and items (aliased l, s and i) from
+    start up to, but not including, end. Months moved out by archive_sales are
+    attached and read alongside the live database, so callers see one ledger.
+
+    :param fields: Column expressions to select, e.g. ["l.id", "s.date"].
+    :param start: Inclusive date string in "YYYY-MM-DD" format, or None for no lower bound.
+    :param end: Exclusive date string in "YYYY-MM-DD" format, or None for no upper bound.
+    :param order: Positions in fields to sort by, or None for no particular order.
+    :param descending: Sort in descending order.
+    :return: A cursor, or a MergedCursor, supporting fetchmany, fetchall, iteration and close.
+    """
+    # Always bound s.date, even for "All": the bound makes the planner walk
+    # idx_sales_date in date order instead of scanning sale_lines and sorting
+    # the whole ledger in a temp B-tree
+    where, params = range_clause("s.date", "" if start is None else start, end)
+    conn = get_connection(POS_DB)
+    months = archived_months_between(start, end, conn)
+
+    if len(months) <= MAX_ATTACHED_ARCHIVES:
+        try:
+            _detach_unused(conn, {f"archive_{month.replace('-', '_')}" for month in months})
+            schemas = ["main"] + attach_archives(conn, months)
+        except sqlite3.OperationalError:
+            schemas = None  # No room left on the shared connection
+        if schemas is not None:
+            return conn.execute(_union_query(fields, schemas, where, order, descending), params * len(schemas))
+
+    # Too many archives for one connection: read them in groups and merge
+    cursors = [conn.execute(_union_query(fields, ["main"], where, order, descending), params)]
+    readers = []
+    for first in range(0, len(months), MAX_ATTACHED_ARCHIVES):
+        reader, schemas = open_archive_reader(months[first:first + MAX_ATTACHED_ARCHIVES])
+        readers.append(reader)
+        cursors.append(reader.execute(_union_query(fields, schemas, where, order, descending),
+                                      params * len(schemas)))
+    return MergedCursor(cursors, readers, order, descending)
+
+
+@timed("inventory_viewer.open_inventory_cursor")
+def open_inventory_cursor(start=None, end=None, sort_column=0, descending=False):
+    """
+    Open a cursor over the inventory rows from start up to, but not including,
+    end, including archived months. Rows are produced as they are fetched, so
+    callers can page through them with fetchmany instead of loading them all.
+
+    :param start: Inclusive date string in "YYYY-MM-DD" format, or None for no lower bound.
+    :param end: Exclusive date string in "YYYY-MM-DD" format, or None for no upper bound.
+    :param sort_column: Index into INVENTORY_COLUMNS to sort by.
+    :param descending: Sort in descending order.
+    :return: Cursor yielding (id, item_name, quantity, total_cents) rows.
+    """
+    order = [sort_column] if sort_column == 0 else [sort_column, 0]
+    return query_sale_lines(_INVENTORY_FIELDS, start, end, order, descending)
+
+
+@timed("inventory_viewer.get_inventory_between")
+def get_inventory_between(start, end):
+    """
+    Fetch inventory data sold from start up to, but not including, end.
+    The bounds compare against the stored "YYYY-MM-DD HH:MM:SS" text, so the
+    lookup is a range scan on the sales date index.
+
+    :param start: Inclusive date string in "YYYY-MM-DD" format.
+    :param end: Exclusive date string in "YYYY-MM-DD" format.
+    :return: List of inventory rows (excluding the date column).
+    """
+    return open_inventory_cursor(start, end).fetchall()
+
+
+@timed("inventory_viewer.get_inventory_by_date")
 def get_inventory_by_date(selected_date):
     """
     Fetch inventory data from the database for the specified date.
@@ -7,11 +194,71 @@ def get_inventory_by_date(selected_date):
     :param selected_date: Date string in "YYYY-MM-DD" format.
     :return: List of inventory rows (excluding the date column).
     """
-    conn = sqlite3.connect("inventory.db")
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, item_name, quantity, total FROM orders WHERE date(date) = ?", (selected_date,)
-    )
-    orders = cursor.fetchall()
-    conn.close()
-    return orders
+    return get_inventory_between(*get_period_range(selected_date))
+
+
+@timed("inventory_viewer.get_item_totals_between")
+def get_item_totals_between(start, end):
+    """
+    Fetch per-item quantity and revenue from start up to, but not including,
+    end, read from the daily_item_totals rollup.
+
+    :param start: Inclusive date string in "YYYY-MM-DD" format, or None for no lower bound.
+    :param end: Exclusive date string in "YYYY-MM-DD" format, or None for no upper bound.
+    :return: List of (item_id, item_name, quantity, total_cents) rows, best sellers first.
+    """
+    where, params = range_clause("r.day", start, end)
+    conn = get_connection(POS_DB)
+    return conn.execute(
+        f"""SELECT r.item_id, i.name, SUM(r.quantity), SUM(r.total_cents)
+            FROM daily_item_totals r JOIN items i ON i.id = r.item_id
+            {where}
+            GROUP BY r.item_id
+            ORDER BY SUM(r.total_cents) DESC""",
+        params,
+    ).fetchall()
+
+
+@timed("inventory_viewer.get_total_between")
+def get_total_between(start, end):
+    """
+    Fetch the revenue from start up to, but not including, end, read from the
+    daily_item_totals rollup.
+
+    :param start: Inclusive date string in "YYYY-MM-DD" format, or None for no lower bound.
+    :param end: Exclusive date string in "YYYY-MM-DD" format, or None for no upper bound.
+    :return: Total amount sold, in centavos.
+    """
+    where, params = range_clause("day", start, end)
+    conn = get_connection(POS_DB)
+    row = conn.execute(
+        f"SELECT COALESCE(SUM(total_cents), 0) FROM daily_item_totals {where}",
+        params,
+    ).fetchone()
+    return row[0]
+
+
+# Columns of the rows yielded by iter_sale_line_chunks
+SALE_LINE_COLUMNS = ("sale_id", "date", "item_id", "item_name", "quantity", "price_cents", "total_cents")
+
+
+def iter_sale_line_chunks(start=None, end=None, chunk_size=1000):
+    """
+    Stream every sale line from start up to, but not including, end in date
+    order, archived months included, chunk_size rows at a time, so any range can be read in constant memory.
+
+    :param start: Inclusive date string in "YYYY-MM-DD" format, or None for no lower bound.
+    :param end: Exclusive date string in "YYYY-MM-DD" format, or None for no upper bound.
+    :param chunk_size: Rows per yielded chunk.
+    :return: Generator of lists of rows with the fields in SALE_LINE_COLUMNS.
+    """
+    cursor = query_sale_lines(["s.id", "s.date", "l.item_id", "i.name", "l.quantity", "l.price_cents", "l.total_cents"],
+                              start, end, order=[1, 0])
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
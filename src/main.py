@@ -1,179 +1,79 @@
+import startup
 import sys
 import os
+import threading
+from datetime import date
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QLabel, QWidget, QGridLayout, QLineEdit, QDialog, QMessageBox, QScrollArea, QCalendarWidget
+    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QTableView,
+    QPushButton, QLabel, QWidget, QGridLayout, QMessageBox, QScrollArea, QLineEdit,
+    QStackedLayout
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap, QIcon
-from menu_db import create_menu_db, load_menu_items, add_menu_item, remove_menu_item
-from inventory_db import create_checkout_db, add_order
-from inventory_viewer import get_inventory_by_date
-from PyQt6.QtWidgets import QFileDialog
-import shutil
-
-class ManageMenuDialog(QDialog):
-    def __init__(self, menu_items, update_menu_callback):
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QPixmap, QIcon, QKeySequence, QShortcut
+startup.mark("import PyQt6")
+from menu_cache import MENU_POLL_INTERVAL_MS, MenuCache
+from schema import migrate
+from cart import format_peso
+from cart_model import CartTableModel
+from image_cache import PixmapCache, load_scaled_image
+from sale_writer import SaleWriter
+from receipt_printer import ReceiptPrinter
+from archive import ARCHIVE_AFTER_DAYS, archive_sales
+from replication import REPLICATION_INTERVAL_MS, is_configured as replication_configured, replicate
+from paths import resource_path
+from perf import timed
+import perf
+startup.mark("import app modules")
+
+# New product tiles built per event-loop turn while the grid fills in
+TILE_BATCH = 12
+
+# Tiles shown for a search; the best matches come first, so more rarely helps
+SEARCH_RESULT_LIMIT = 48
+
+# Typing pause, in milliseconds, before the grid is filtered, so a fast typist
+# or a barcode scanner does not relayout the grid on every keystroke
+SEARCH_DEBOUNCE_MS = 80
+
+
+class ProductTile(QWidget):
+    """A product grid tile: image, name and an "Add to Order" button."""
+
+    def __init__(self, product, pixmap_cache, add_to_order):
         super().__init__()
-        self.setWindowTitle("Manage Menu")
-        self.menu_items = menu_items
-        self.update_menu_callback = update_menu_callback
-        self.image_path = None  # To store the uploaded image path
-
-        layout = QVBoxLayout()
-
-        # Upload Image Section
-        self.upload_image_button = QPushButton("Upload Image")
-        self.upload_image_button.clicked.connect(self.upload_image)
-        layout.addWidget(self.upload_image_button)
-
-        self.image_preview = QLabel("No image uploaded")
-        self.image_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_preview.setStyleSheet("border: 1px solid gray; padding: 5px;")
-        layout.addWidget(self.image_preview)
-
-        # Add Item Section
-        self.item_name_input = QLineEdit()
-        self.item_name_input.setPlaceholderText("Enter item name")
-        self.item_price_input = QLineEdit()
-        self.item_price_input.setPlaceholderText("Enter item price")
-
-        add_item_button = QPushButton("Add Item")
-        add_item_button.clicked.connect(self.add_item)
-
-        layout.addWidget(self.item_name_input)
-        layout.addWidget(self.item_price_input)
-        layout.addWidget(add_item_button)
-
-        # Remove Item Section
-        self.item_remove_input = QLineEdit()
-        self.item_remove_input.setPlaceholderText("Enter item name to remove")
-        remove_item_button = QPushButton("Remove Item")
-        remove_item_button.clicked.connect(self.remove_item)
-
-        layout.addWidget(self.item_remove_input)
-        layout.addWidget(remove_item_button)
-
-        self.setLayout(layout)
-
-    def upload_image(self):
-        """Handles uploading an image to the res folder."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.gif)")
-        if not file_path:
-            return  # User canceled the dialog
-
-        base_path = os.path.dirname(__file__)  # Current script directory
-        res_folder = os.path.join(base_path, "../res")
-        os.makedirs(res_folder, exist_ok=True)
-
-        try:
-            file_name = os.path.basename(file_path)
-            destination_path = os.path.join(res_folder, file_name)
-            shutil.copy(file_path, destination_path)
-            self.image_path = destination_path  # Store the path of the uploaded image
-
-            # Update the preview label with the uploaded image
-            pixmap = QPixmap(destination_path).scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio)
-            self.image_preview.setPixmap(pixmap)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to upload image: {str(e)}")
-
-    def add_item(self):
-        """Adds a new item with an uploaded or default image to the menu."""
-        name = self.item_name_input.text()
-        try:
-            price = float(self.item_price_input.text())
-        except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Price must be a number!")
-            return
-
-        # Use default image if no image is uploaded
-        if not self.image_path:
-            base_path = os.path.dirname(__file__)  # Current script directory
-            res_folder = os.path.join(base_path, "../res")
-            self.image_path = os.path.join(res_folder, "no-image.png")
-
-            # Verify that the default image exists
-            if not os.path.exists(self.image_path):
-                QMessageBox.critical(self, "Error", "Default image (no-image.png) is missing!")
-                return
-
-        if name:
-            # Embed the image path with the menu item
-            add_menu_item(name, price, self.image_path)
-            QMessageBox.information(self, "Item Added", f"{name} added to menu!")
-            self.update_menu_callback()
-            self.item_name_input.clear()
-            self.item_price_input.clear()
-            self.image_preview.clear()
-            self.image_preview.setText("No image uploaded")
-            self.image_path = None
-        else:
-            QMessageBox.warning(self, "Invalid Input", "Item name cannot be empty!")
-
-    def remove_item(self):
-        """Removes an item from the menu."""
-        name = self.item_remove_input.text()
-        if name in [item["name"] for item in self.menu_items]:
-            remove_menu_item(name)
-            QMessageBox.information(self, "Item Removed", f"{name} removed from menu!")
-            self.update_menu_callback()
-            self.item_remove_input.clear()
-        else:
-            QMessageBox.warning(self, "Not Found", f"{name} not found in menu!")
-
-
-
-class ViewInventoryDialog(QDialog):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("View Inventory")
-
-        self.resize(800, 600)
-
-        layout = QVBoxLayout()
-
-        # Add a label and calendar
-        self.date_label = QLabel("Select Date:")
-        layout.addWidget(self.date_label)
-
-        self.calendar = QCalendarWidget()
-        self.calendar.selectionChanged.connect(self.update_table)
-        layout.addWidget(self.calendar)
-
-        # Add a table widget to show inventory data
-        self.table = QTableWidget(0, 4)  # Exclude the date column
-        self.table.setHorizontalHeaderLabels(["ID", "Item Name", "Quantity", "Total Price"])
-        self.table.horizontalHeader().setStretchLastSection(True)
-        layout.addWidget(self.table)
-
-        # Add a label to show the total sum of the prices
-        self.total_label = QLabel("Total Amount: ₱0.00")
-        self.total_label.setStyleSheet("font-weight: bold;")
-        layout.addWidget(self.total_label)
-
-        self.setLayout(layout)
-        self.update_table()  # Load the initial data
-
-    def update_table(self):
-        """Updates the inventory table based on the selected date."""
-        selected_date = self.calendar.selectedDate().toString("yyyy-MM-dd")
-
-        # Fetch filtered orders using the backend function
-        orders = get_inventory_by_date(selected_date)
-
-        # Populate the table
-        self.table.setRowCount(0)  # Clear existing rows
-        total_amount = 0
-        for row_number, row_data in enumerate(orders):
-            self.table.insertRow(row_number)
-            for column_number, data in enumerate(row_data):
-                self.table.setItem(row_number, column_number, QTableWidgetItem(str(data)))
-
-            total_amount += row_data[3]
-
-        self.total_label.setText(f"Total Amount: ₱{total_amount:.2f}")
-
+        self.product = product
+        self.pixmap_cache = pixmap_cache
+        self.grid_position = None
+
+        # Add the item image; the cache falls back to the placeholder if the image is missing
+        self.image_label = QLabel()
+        self.image_label.setPixmap(self.pixmap_cache.get(product["image_path"]))
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        # Add the item name
+        self.name_label = QLabel(product["name"])
+        self.name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.name_label.setStyleSheet("font-weight: bold; font-size: 14px; margin-top: 5px;")
+
+        add_button = QPushButton("Add to Order")
+        add_button.setStyleSheet("background-color: green; color: white;")
+        add_button.setMinimumSize(120, 40)
+        # Read self.product at click time so a repriced item charges its new price
+        add_button.clicked.connect(lambda: add_to_order(self.product))
+
+        item_container = QVBoxLayout(self)
+        item_container.addWidget(self.image_label)
+        item_container.addWidget(self.name_label)
+        item_container.addWidget(add_button)
+        item_container.setSpacing(5)
+
+    def set_product(self, product):
+        """Points the tile at a reloaded product, redrawing only what changed."""
+        if product["image_path"] != self.product["image_path"]:
+            self.image_label.setPixmap(self.pixmap_cache.get(product["image_path"]))
+        if product["name"] != self.product["name"]:
+            self.name_label.setText(product["name"])
+        self.product = product
 
 
 class POSMainWindow(QMainWindow):
@@ -182,20 +82,21 @@ class POSMainWindow(QMainWindow):
         self.setWindowTitle("Pastilan POS System")
         self.setGeometry(100, 100, 1200, 700)
 
-        create_checkout_db()  # Initialize the checkout database
-        self.menu_items = load_menu_items()
-        
-        # Determine the icon path
-        if getattr(sys, 'frozen', False):  # If the app is frozen (compiled)
-            base_path = os.path.dirname(sys.executable)
-        else:  # If running as a script
-            base_path = os.path.dirname(__file__)
-
-        image_path = os.path.join(base_path, "..", "res", "icon.png")
-
 
-        # Set the application icon
-        self.setWindowIcon(QIcon(image_path))  # Replace with your icon file path
+        # Save sales on a background thread; this also re-queues any left unsaved by a crash
+        self.sale_writer = SaleWriter(parent=self)
+        self.sale_writer.sale_saved.connect(self.on_sale_saved)
+        self.sale_writer.sale_failed.connect(self.on_sale_failed)
+        # Print receipts and reports on worker threads; only completion comes back here
+        self.receipt_printer = ReceiptPrinter(parent=self)
+        self.receipt_printer.printed.connect(self.on_printed)
+        self.receipt_printer.failed.connect(self.on_print_failed)
+        # The menu is cached in memory and kept current from the menu change log
+        self.menu_cache = MenuCache()
+        self.menu_items = self.menu_cache.items
+        
+        # Set the application icon; QIcon only decodes the file when it is drawn
+        self.setWindowIcon(QIcon(resource_path("icon.png")))
 
         main_widget = QWidget()
         main_layout = QHBoxLayout(main_widget)
@@ -204,30 +105,23 @@ class POSMainWindow(QMainWindow):
         sidebar = QVBoxLayout()
         sidebar.setSpacing(10)
         
-        # Determine the base path
-        if getattr(sys, 'frozen', False):  # If the app is frozen (compiled)
-            base_path = os.path.dirname(sys.executable)
-        else:  # If running as a script
-            base_path = os.path.dirname(__file__)
-
-        # Set the image path relative to the base path
-        image_logo_path = os.path.join(base_path, "..", "res", "logo.png")
+        # Set the image path relative to the res folder
+        image_logo_path = resource_path("logo.png")
 
         # Check if the file exists before loading the image
         if not os.path.exists(image_logo_path):
             print(f"Error: The image file does not exist at path {image_logo_path}")
         else:
-            # Create the label and load the image
+            # Create the label and load the image, decoded straight at its display size
             image_label = QLabel()
-            pixmap = QPixmap(image_logo_path)
+            image = load_scaled_image(image_logo_path, 100)
 
-            if pixmap.isNull():
+            if image.isNull():
                 print(f"Failed to load image: {image_logo_path}")
             
             else:
-                # Scale the pixmap and set it
-                pixmap = pixmap.scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio)
-                image_label.setPixmap(pixmap)
+                # Set the scaled pixmap
+                image_label.setPixmap(QPixmap.fromImage(image))
                 image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
                 # Assuming you have a layout or container to add this image label to
@@ -243,12 +137,32 @@ class POSMainWindow(QMainWindow):
         view_inventory_button.clicked.connect(self.open_view_inventory)
         sidebar.addWidget(view_inventory_button)
 
+        # Add the "Sales Analytics" button below "View Inventory"
+        analytics_button = QPushButton("Sales Analytics")
+        analytics_button.clicked.connect(self.open_sales_analytics)
+        sidebar.addWidget(analytics_button)
+
+        # Add the "End of Day Report" button below "Sales Analytics"
+        z_report_button = QPushButton("End of Day Report")
+        z_report_button.clicked.connect(self.print_z_report)
+        sidebar.addWidget(z_report_button)
+
+        # Add the "Performance" button when instrumentation is turned on
+        self.perf_panel = None
+        if perf.is_enabled():
+            perf_button = QPushButton("Performance")
+            perf_button.clicked.connect(self.open_perf_panel)
+            sidebar.addWidget(perf_button)
+
         main_layout.addLayout(sidebar)
 
         # Order Summary (Center Panel)
         order_summary = QVBoxLayout()
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(["Item", "Qty", "Price", "Total", "Actions"])
+        self.cart_model = CartTableModel(self)
+        self.cart_model.rowsInserted.connect(self.add_subtract_buttons)
+        self.cart_model.total_changed.connect(self.update_total)
+        self.table = QTableView()
+        self.table.setModel(self.cart_model)
         self.table.setColumnWidth(0, 150)
         self.table.setColumnWidth(1, 85)
         self.table.setColumnWidth(2, 100)
@@ -264,26 +178,60 @@ class POSMainWindow(QMainWindow):
 
 
         checkout_btn = QPushButton("Submit")
-        checkout_btn.clicked.connect(self.checkout)  # Connect to checkout functionality
+        checkout_btn.clicked.connect(lambda: self.checkout())  # Connect to checkout functionality
         checkout_btn.setFixedSize(800,40)
         checkout_btn.setStyleSheet("background-color: #32CD32; color: white;")
         order_summary.addWidget(checkout_btn)
         main_layout.addLayout(order_summary)
 
-        # Product Grid (Right Panel with Scroll Area)
+        # Product Grid (Right Panel with Scroll Area). The whole menu and the
+        # search results are separate grids in scroll areas stacked on top of
+        # each other, and a search only raises one over the other. Hiding and
+        # showing the menu would touch every tile, so clearing a search on a
+        # large menu would stall the register; raising it is a repaint
         self.product_grid = QGridLayout()
         self.product_grid.setSpacing(5)
-
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-
         grid_container = QWidget()
         grid_container.setLayout(self.product_grid)
-
-        scroll_area.setWidget(grid_container)
+        self.menu_view = QScrollArea()
+        self.menu_view.setWidgetResizable(True)
+        self.menu_view.setWidget(grid_container)
+
+        self.result_grid = QGridLayout()
+        self.result_grid.setSpacing(5)
+        result_container = QWidget()
+        result_container.setLayout(self.result_grid)
+        self.result_view = QScrollArea()
+        self.result_view.setWidgetResizable(True)
+        self.result_view.setWidget(result_container)
+
+        self.grid_views = QStackedLayout()
+        self.grid_views.setStackingMode(QStackedLayout.StackingMode.StackAll)
+        self.grid_views.addWidget(self.result_view)
+        self.grid_views.addWidget(self.menu_view)
+        self.grid_views.setCurrentWidget(self.menu_view)
+
+        # Search box (above the grid): filters the grid as the cashier types;
+        # Enter adds the best match, so a scanned code rings the item up
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search item or enter code, then press Enter")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMinimumHeight(32)
+        self.search_box.textChanged.connect(self.search_changed)
+        self.search_box.returnPressed.connect(self.quick_add)
+        QShortcut(QKeySequence.StandardKey.Find, self, self.search_box.setFocus)
+        clear_search = QShortcut(QKeySequence(Qt.Key.Key_Escape), self.search_box, self.search_box.clear)
+        clear_search.setContext(Qt.ShortcutContext.WidgetShortcut)
+
+        self.search_query = ""
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
 
         right_panel = QVBoxLayout()
-        right_panel.addWidget(scroll_area)
+        right_panel.addWidget(self.search_box)
+        right_panel.addLayout(self.grid_views)
         main_layout.addLayout(right_panel)
 
         # Set proportions for the panels
@@ -292,142 +240,303 @@ class POSMainWindow(QMainWindow):
         main_layout.setStretch(2, 3)  # Product Grid
 
         self.setCentralWidget(main_widget)
-        self.update_product_grid()
+
+        # Scaled product images, so a grid refresh never decodes a photo twice
+        self.pixmap_cache = PixmapCache(resource_path("no-image.png"))
+        self.product_tiles = {}  # Grid tiles keyed by menu item id
+        self.result_tiles = []  # Search result tiles, reused from one search to the next
+
+        # Dialogs are built the first time they are opened
+        self.manage_menu_dialog = None
+        self.view_inventory_dialog = None
+        self.sales_analytics_dialog = None
+
+        # Fill the grid in after the window is on screen, a few tiles per event-loop turn
+        QTimer.singleShot(0, lambda: self.update_product_grid(progressive=True))
+
+        # Pick up menu edits made on other terminals sharing the database
+        self.menu_poll_timer = QTimer(self)
+        self.menu_poll_timer.timeout.connect(self.poll_menu)
+        self.menu_poll_timer.start(MENU_POLL_INTERVAL_MS)
 
     def open_manage_menu(self):
         """Opens the Manage Menu dialog."""
-        dialog = ManageMenuDialog(self.menu_items, self.update_product_grid)
-        dialog.exec()
+        if self.manage_menu_dialog is None:
+            from menu_dialog import ManageMenuDialog
+            self.manage_menu_dialog = ManageMenuDialog(self.menu_cache, self.refresh_menu)
+        self.manage_menu_dialog.exec()
 
     def open_view_inventory(self):
         """Opens the View Inventory dialog."""
-        dialog = ViewInventoryDialog()
-        dialog.exec()
-
-    def update_product_grid(self):
-        """Updates the product grid dynamically based on the menu items."""
-        for i in reversed(range(self.product_grid.count())):
-            self.product_grid.itemAt(i).widget().deleteLater()
+        if self.view_inventory_dialog is None:
+            from inventory_dialog import ViewInventoryDialog
+            self.view_inventory_dialog = ViewInventoryDialog()
+        else:
+            self.view_inventory_dialog.update_table()  # Show sales made since it was last open
+        self.view_inventory_dialog.exec()
+
+    def open_sales_analytics(self):
+        """Opens the Sales Analytics dialog."""
+        if self.sales_analytics_dialog is None:
+            from analytics_dialog import SalesAnalyticsDialog
+            self.sales_analytics_dialog = SalesAnalyticsDialog()
+        self.sales_analytics_dialog.exec()
+
+    def open_perf_panel(self):
+        """Opens the Performance panel beside the register."""
+        from perf_panel import PerfPanel
+        if self.perf_panel is None:
+            self.perf_panel = PerfPanel()
+        self.perf_panel.show()
+        self.perf_panel.raise_()
+
+    def refresh_menu(self):
+        """Applies menu changes made from this register and updates the grid to match."""
+        # The cache updates the list in place, so dialogs holding it see the new menu
+        if self.menu_cache.refresh():
+            self.update_product_grid()
+            self.update_search_results()
+
+    def poll_menu(self):
+        """Updates the grid if another terminal changed the menu."""
+        if self.menu_cache.poll():
+            self.update_product_grid()
+            self.update_search_results()
+
+    def search_changed(self, text):
+        """Filters the grid once the cashier pauses typing."""
+        self.search_timer.start()
+
+    def apply_search(self):
+        """Shows only the items matching the search box, or the whole menu when it is empty."""
+        self.search_timer.stop()
+        query = self.search_box.text().strip()
+        if query == self.search_query:
+            return
+        self.search_query = query
+        # raise_() rather than setCurrentWidget(), which turns updates off and
+        # back on for every widget in the stack
+        if query:
+            self.update_search_results()
+            self.result_view.raise_()
+        else:
+            self.menu_view.raise_()
 
+    @timed("main.quick_add")
+    def quick_add(self):
+        """Adds the best match for the search box to the order and clears it for the next item."""
+        query = self.search_box.text().strip()
+        if not query:
+            return
+        # Look the query up directly: the grid may still be showing an older search
+        product = self.menu_cache.find_code(query)
+        if product is None:
+            matches = self.menu_cache.search(query, 1)
+            product = matches[0] if matches else None
+        if product is None:
+            QApplication.beep()
+            self.statusBar().showMessage(f"No item matches \"{query}\".", 3000)
+            self.search_box.selectAll()
+            return
+        self.add_to_order(product)
+        self.statusBar().showMessage(f"Added {product['name']}.", 2000)
+        self.search_box.clear()
+
+    @timed("main.update_product_grid")
+    def update_product_grid(self, progressive=False):
+        """
+        Brings the product grid in line with the menu items. Tiles are keyed by
+        item id: only added, removed or edited items create, delete or redraw a
+        tile, and tiles are moved only when their position changes. With
+        progressive set, at most TILE_BATCH tiles are built per call and the
+        rest are left to follow-up calls queued on the event loop.
+        """
+        current_ids = {product["id"] for product in self.menu_items}
+        for item_id in [item_id for item_id in self.product_tiles if item_id not in current_ids]:
+            tile = self.product_tiles.pop(item_id)
+            self.product_grid.removeWidget(tile)
+            tile.deleteLater()
+
+        created = 0
         for index, product in enumerate(self.menu_items):
-            row = index // 2
-            col = index % 2
-
-            # Add the item image
-            image_label = QLabel()
-            if product["image_path"] and os.path.exists(product["image_path"]):
-                pixmap = QPixmap(product["image_path"]).scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio)
-                image_label.setPixmap(pixmap)
+            tile = self.product_tiles.get(product["id"])
+            if tile is None:
+                if progressive and created == TILE_BATCH:
+                    QTimer.singleShot(0, lambda: self.update_product_grid(progressive=True))
+                    return
+                created += 1
+                tile = ProductTile(product, self.pixmap_cache, self.add_to_order)
+                self.product_tiles[product["id"]] = tile
+            elif tile.product != product:
+                tile.set_product(product)
+
+            position = (index // 2, index % 2)
+            if tile.grid_position != position:
+                if tile.grid_position is not None:
+                    self.product_grid.removeWidget(tile)
+                self.product_grid.addWidget(tile, *position)
+                tile.grid_position = position
+
+        if progressive:
+            startup.done("product grid filled")
+
+    @timed("main.update_search_results")
+    def update_search_results(self):
+        """
+        Fills the search results grid with the best matches for the search box.
+        At most SEARCH_RESULT_LIMIT tiles are ever built; each keeps its cell
+        and is pointed at whichever product lands there, and tiles past the
+        last match are hidden until a later search needs them.
+        """
+        if not self.search_query:
+            return
+        products = self.menu_cache.search(self.search_query, SEARCH_RESULT_LIMIT)
+        for index, product in enumerate(products):
+            if index < len(self.result_tiles):
+                tile = self.result_tiles[index]
+                if tile.product != product:
+                    tile.set_product(product)
+                if tile.isHidden():
+                    tile.show()
             else:
-                # Use a default placeholder if the image is missing
-                default_image_path = os.path.join(os.path.dirname(__file__), "../res/no-image.png")
-                pixmap = QPixmap(default_image_path).scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio)
-                image_label.setPixmap(pixmap)
-            image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            # Add the item name
-            name_label = QLabel(product["name"])
-            name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            name_label.setStyleSheet("font-weight: bold; font-size: 14px; margin-top: 5px;")
-            item_container = QVBoxLayout()
-
-            # Add the components to the container
-            item_container.addWidget(image_label)
-            item_container.addWidget(name_label)
-            item_container.setSpacing(10)
-
-             # Create a widget for the container and add it to the grid
-            item_widget = QWidget()
-            item_widget.setLayout(item_container)
-            self.product_grid.addWidget(item_widget, row, col)
-
-            add_button = QPushButton("Add to Order")
-            add_button.setStyleSheet("background-color: green; color: white;")
-            add_button.setMinimumSize(120, 40)
-            add_button.clicked.connect(lambda _, p=product: self.add_to_order(p))
-
-            item_container.addWidget(add_button)
-            item_container.setSpacing(5)
-
-            item_widget = QWidget()
-            item_widget.setLayout(item_container)
-            self.product_grid.addWidget(item_widget, row, col)
-
-    def update_total(self):
-        """Calculates and updates the total price displayed in the center panel."""
-        total_price = 0.0
-        for row in range(self.table.rowCount()):
-            total_item_price = float(self.table.item(row, 3).text().replace("₱", ""))
-            total_price += total_item_price
-
-        self.total_label.setText(f"Total: ₱{total_price:.2f}")
-
+                tile = ProductTile(product, self.pixmap_cache, self.add_to_order)
+                self.result_tiles.append(tile)
+                self.result_grid.addWidget(tile, index // 2, index % 2)
+        for tile in self.result_tiles[len(products):]:
+            tile.hide()
+
+    def update_total(self, total_cents):
+        """Shows the running order total in the center panel."""
+        self.total_label.setText(f"Total: {format_peso(total_cents)}")
+
+    def add_subtract_buttons(self, parent, first, last):
+        """Puts a "-" button on each newly added order row."""
+        for row in range(first, last + 1):
+            item_id = self.cart_model.cart.lines[row].item_id
+            subtract_button = QPushButton("-")
+            subtract_button.setStyleSheet("background-color: red; color: white; border: none;")
+            # Bind the item, not the row: rows shift when earlier lines are removed
+            subtract_button.clicked.connect(lambda _, item_id=item_id: self.subtract_qty(item_id))
+            self.table.setIndexWidget(self.cart_model.index(row, 4), subtract_button)
+
+    @timed("main.add_to_order")
     def add_to_order(self, product):
-        item_name = product["name"]
-        item_price = product["price"]
-
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 0).text() == item_name:
-                current_qty = int(self.table.item(row, 1).text())
-                self.table.setItem(row, 1, QTableWidgetItem(str(current_qty + 1)))
-                new_total = (current_qty + 1) * item_price
-                self.table.setItem(row, 3, QTableWidgetItem(f"₱{new_total:.2f}"))
-                self.update_total()  # Update the total after adding
-                return
-
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-        self.table.setItem(row_position, 0, QTableWidgetItem(item_name))
-        self.table.setItem(row_position, 1, QTableWidgetItem("1"))
-        self.table.setItem(row_position, 2, QTableWidgetItem(f"₱{item_price:.2f}"))
-        self.table.setItem(row_position, 3, QTableWidgetItem(f"₱{item_price:.2f}"))
-
-        subtract_button = QPushButton("-")
-        subtract_button.setStyleSheet("background-color: red; color: white; border: none;")
-        subtract_button.clicked.connect(lambda _, r=row_position: self.subtract_qty(r, item_price))
-        self.table.setCellWidget(row_position, 4, subtract_button)
-
-        self.update_total()
-
-    def subtract_qty(self, row, item_price):
-        current_qty = int(self.table.item(row, 1).text())
-        if current_qty > 1:
-            new_qty = current_qty - 1
-            self.table.setItem(row, 1, QTableWidgetItem(str(new_qty)))
-            new_total = new_qty * item_price
-            self.table.setItem(row, 3, QTableWidgetItem(f"₱{new_total:.2f}"))
-        else:
-            self.table.removeRow(row)
+        self.cart_model.add_item(product["id"], product["name"], product["price_cents"])
 
-        self.update_total()
+    def subtract_qty(self, item_id):
+        self.cart_model.subtract_item(item_id)
 
+    @timed("main.checkout")
     def checkout(self):
         """Handles checkout process by storing orders in the database."""
-        row_count = self.table.rowCount()
-
-        if row_count == 0:
+        if len(self.cart_model.cart) == 0:
             QMessageBox.warning(self, "Empty Order", "No items in the order to check out!")
             return
 
-        # Loop through the table to get order details
-        for row in range(row_count):
-            item_name = self.table.item(row, 0).text()
-            quantity = int(self.table.item(row, 1).text())
-            price = float(self.table.item(row, 2).text().replace("₱", ""))
-            total = float(self.table.item(row, 3).text().replace("₱", ""))
+        # Hand the whole order, in exact centavos, to the background writer as one sale
+        cart = self.cart_model.cart
+        sale = self.sale_writer.submit(cart.sale_lines())
+
+        # Print the receipt from a copy of the order, stamped as the sale was
+        # stored; a slow printer never holds up the next one
+        self.receipt_printer.print_receipt({
+            "uid": sale["uid"],
+            "date": sale["date"],
+            "total_cents": cart.total_cents,
+            "lines": cart.receipt_lines(),
+        })
+
+        # Clear the order after checkout so the next one can start right away
+        self.cart_model.clear()
+        self.statusBar().showMessage("Order checked out.", 3000)
+
+    def on_sale_saved(self, uid):
+        """Confirms in the status bar that a queued sale reached the database."""
+        self.statusBar().showMessage("Order has been successfully checked out!", 3000)
+
+    def on_sale_failed(self, uid, message):
+        """Reports a sale the background writer could not store yet, or had to set aside."""
+        self.statusBar().showMessage(f"Saving order failed: {message}")
+
+    def print_z_report(self):
+        """Prints today's end-of-day report in the background."""
+        self.receipt_printer.print_z_report(date.today().isoformat())
+        self.statusBar().showMessage("Preparing end-of-day report...")
+
+    def on_printed(self, kind, path):
+        """Confirms in the status bar that a report was sent to the printer."""
+        if kind == "z-report":
+            self.statusBar().showMessage(f"End-of-day report sent to the printer ({os.path.basename(path)}).", 5000)
+
+    def on_print_failed(self, kind, message):
+        """Reports a receipt or report that could not be printed."""
+        what = "end-of-day report" if kind == "z-report" else "receipt"
+        self.statusBar().showMessage(f"Printing the {what} failed: {message}", 10_000)
+
+    def closeEvent(self, event):
+        """Stores any sales still queued and finishes printing before the window closes."""
+        self.sale_writer.stop()
+        self.receipt_printer.stop()
+        super().closeEvent(event)
+
+
+# Move old sales out of the live database without holding up the register
+def start_archiving():
+    def run():
+        try:
+            archive_sales(ARCHIVE_AFTER_DAYS)
+        except Exception as e:
+            print(f"Archiving old sales failed: {e}", file=sys.stderr)
 
-            # Add order to the checkout database
-            add_order(item_name, quantity, price, total)
+    threading.Thread(target=run, name="archive", daemon=True).start()
 
-        # Clear the table after checkout
-        self.table.setRowCount(0)
-        QMessageBox.information(self, "Order Checked Out", "Order has been successfully checked out!")
+
+# Ship new sales to the central store, one run at a time
+_replication_running = threading.Lock()
+
+def start_replication():
+    if not _replication_running.acquire(blocking=False):
+        return  # The previous run is still going, e.g. waiting out an outage
+
+    def run():
+        try:
+            replicate()
+        except Exception as e:
+            # The central store is out of reach; the next run resumes from its watermark
+            print(f"Shipping sales to the central store failed: {e}", file=sys.stderr)
+        finally:
+            _replication_running.release()
+
+    threading.Thread(target=run, name="replication", daemon=True).start()
 
 
 if __name__ == "__main__":
-    create_menu_db()
+    # Turn on the timing layer before any database connection is opened
+    if "--perf" in sys.argv:
+        perf.enable()
+
+    migrate()  # Create the database, or bring an older one up to date
+    startup.mark("databases ready")
 
     app = QApplication(sys.argv)
+    startup.mark("QApplication")
     window = POSMainWindow()
+    startup.mark("main window built")
     window.show()
+    startup.mark("main window shown")
+
+    # Print the startup timings once the product grid has filled in
+    startup.report_when_done("--profile-startup" in sys.argv)
+    QTimer.singleShot(0, lambda: startup.mark("first event loop turn"))
+
+    # Archive once the window has settled, so startup does not wait on it
+    if ARCHIVE_AFTER_DAYS > 0:
+        QTimer.singleShot(10_000, start_archiving)
+
+    if replication_configured():
+        replication_timer = QTimer()
+        replication_timer.timeout.connect(start_replication)
+        replication_timer.start(REPLICATION_INTERVAL_MS)
+        QTimer.singleShot(5_000, start_replication)
+
     sys.exit(app.exec())
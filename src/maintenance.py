@@ -0,0 +1,152 @@
+import argparse
+import json
+import sys
+from datetime import date
+from archive import ARCHIVE_AFTER_DAYS, archive_sales
+from cart import format_peso
+from inventory_db import rebuild_daily_totals, verify_daily_totals, verify_hourly_totals
+from schema import migrate
+from sales_export import EXPORT_FORMATS, export_sales
+
+
+# Recompute the daily rollups from the raw sales
+def rebuild_rollup(args):
+    rebuild_daily_totals()
+    print("daily_item_totals and hourly_totals rebuilt from sales")
+    return 0
+
+# Check the daily rollups against the raw sales
+def verify_rollup(args):
+    mismatches = verify_daily_totals()
+    for day, item_id, stored_qty, stored_total, actual_qty, actual_total in mismatches:
+        print(f"{day} item {item_id}: rollup {stored_qty} / {format_peso(stored_total)}, "
+              f"sales {actual_qty} / {format_peso(actual_total)}")
+    hourly_mismatches = verify_hourly_totals()
+    for day, hour, stored_total, actual_total in hourly_mismatches:
+        print(f"{day} {hour:02d}:00: rollup {format_peso(stored_total)}, sales {format_peso(actual_total)}")
+    if mismatches or hourly_mismatches:
+        print(f"{len(mismatches) + len(hourly_mismatches)} mismatched rows; run rebuild-rollup to fix them")
+        return 1
+    print("daily_item_totals and hourly_totals match sales")
+    return 0
+
+# Stream the sales in a date range to a CSV or JSON Lines file
+def export(args):
+    written = export_sales(args.output, args.start, args.end, args.format)
+    print(f"{written} sale lines written to {args.output}")
+    return 0
+
+# Print top sellers, hourly revenue and the daily trend as JSON
+def analytics(args):
+    from analytics import compute_analytics, is_available
+    if not is_available():
+        print("sales analytics needs NumPy to be installed", file=sys.stderr)
+        return 1
+    print(json.dumps(compute_analytics(args.start, args.end, args.top), indent=2))
+    return 0
+
+# Move old sales into the monthly archive files
+def archive(args):
+    months = archive_sales(args.older_than)
+    if months:
+        print(f"archived sales from {', '.join(months)}")
+    else:
+        print("no sales old enough to archive")
+    return 0
+
+# Delete uploaded images that no menu item uses
+def prune(args):
+    from image_store import prune_images
+    from menu_db import load_menu_items
+    removed = prune_images(item["image_path"] for item in load_menu_items())
+    print(f"{removed} unused images removed")
+    return 0
+
+# Ship new sales to the central store
+def replicate(args):
+    from replication import replicate as ship_sales
+    shipped = ship_sales(args.central)
+    print(f"{shipped} sales shipped to the central store")
+    return 0
+
+# Print consolidated totals from the central store
+def central_report(args):
+    from replication import central_item_totals, central_terminal_totals
+    for terminal_id, sale_count, total in central_terminal_totals(args.start, args.end, args.central):
+        print(f"{terminal_id:<16} {sale_count:8d} sales {format_peso(total):>14}")
+    print()
+    for item_name, quantity, total in central_item_totals(args.start, args.end, args.central):
+        print(f"{item_name:<30} {quantity:8d} {format_peso(total):>14}")
+    return 0
+
+# Add the items of a CSV or JSON manifest to the menu
+def import_items(args):
+    from menu_import import format_summary, import_menu
+    summary = import_menu(args.manifest, args.workers)
+    print(format_summary(summary))
+    return 1 if summary["problems"] else 0
+
+# Print the end-of-day report of a day to the spool folder
+def z_report(args):
+    from receipts import spool_z_report
+    print(f"end-of-day report written to {spool_z_report(args.day)}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Pastilan POS maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("rebuild-rollup", help="recompute the daily and hourly rollups from sales").set_defaults(run=rebuild_rollup)
+    commands.add_parser("verify-rollup", help="compare the daily and hourly rollups with sales").set_defaults(run=verify_rollup)
+
+    export_parser = commands.add_parser("export-sales", help="write sales in a date range to CSV or JSON Lines")
+    export_parser.add_argument("output", help="file to write; .jsonl selects JSON Lines, anything else CSV")
+    export_parser.add_argument("--start", help="first day to include, YYYY-MM-DD")
+    export_parser.add_argument("--end", help="day to stop before, YYYY-MM-DD")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, help="override the format picked from the file name")
+    export_parser.set_defaults(run=export)
+
+    analytics_parser = commands.add_parser("analytics", help="print sales analytics for a date range as JSON")
+    analytics_parser.add_argument("--start", help="first day to include, YYYY-MM-DD")
+    analytics_parser.add_argument("--end", help="day to stop before, YYYY-MM-DD")
+    analytics_parser.add_argument("--top", type=int, default=10, help="number of top items to list")
+    analytics_parser.set_defaults(run=analytics)
+
+    archive_parser = commands.add_parser("archive", help="move old sales into monthly archive files")
+    archive_parser.add_argument("--older-than", type=int, default=ARCHIVE_AFTER_DAYS or 90, metavar="DAYS",
+                                help="archive sales older than this many days")
+    archive_parser.set_defaults(run=archive)
+
+    commands.add_parser("prune-images", help="delete uploaded images no menu item uses").set_defaults(run=prune)
+
+    replicate_parser = commands.add_parser("replicate", help="ship new sales to the central store")
+    replicate_parser.add_argument("--central", help="central store directory; defaults to PASTILAN_CENTRAL_DIR")
+    replicate_parser.set_defaults(run=replicate)
+
+    report_parser = commands.add_parser("central-report", help="print totals across every register")
+    report_parser.add_argument("--start", help="first day to include, YYYY-MM-DD")
+    report_parser.add_argument("--end", help="day to stop before, YYYY-MM-DD")
+    report_parser.add_argument("--central", help="central store directory; defaults to PASTILAN_CENTRAL_DIR")
+    report_parser.set_defaults(run=central_report)
+
+    import_parser = commands.add_parser("import-menu", help="add the items of a CSV or JSON manifest to the menu")
+    import_parser.add_argument("manifest", help="CSV with name, price, image and code columns, or a JSON list of items")
+    import_parser.add_argument("--workers", type=int, help="image worker threads; defaults to the CPU count")
+    import_parser.set_defaults(run=import_items)
+
+    z_report_parser = commands.add_parser("z-report", help="print a day's end-of-day report to the spool folder")
+    z_report_parser.add_argument("--day", default=date.today().isoformat(), help="day to report, YYYY-MM-DD; defaults to today")
+    z_report_parser.set_defaults(run=z_report)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    migrate()
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+from db import POS_DB, get_connection
+from menu_db import get_menu_log_position, load_menu_changes, load_menu_items
+from menu_search import MenuSearchIndex
+
+# How often, in milliseconds, the register checks the database for menu changes
+MENU_POLL_INTERVAL_MS = 2000
+
+
+class MenuCache:
+    """
+    In-memory copy of the menu, kept current from the menu_log change table.
+    poll() costs a single PRAGMA when nothing changed, and a change only reloads
+    and reindexes the items it touched, so it is cheap to run on a timer. Each
+    instance reads through its thread's connection and must stay on that thread.
+    """
+
+    def __init__(self):
+        self.items = []  # Menu items in id order; updated in place so holders see changes
+        self.by_id = {}
+        self.by_name = {}
+        self.index = MenuSearchIndex()
+        self.position = 0
+        self.data_version = None
+        self.reload()
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, item_id):
+        """Returns the menu item with the given id, or None."""
+        return self.by_id.get(item_id)
+
+    def find(self, name):
+        """Returns the menu item with the given name, or None."""
+        return self.by_name.get(name)
+
+    def find_code(self, code):
+        """Returns the menu item with the given PLU or barcode, or None."""
+        item_id = self.index.lookup_code(code)
+        return None if item_id is None else self.by_id[item_id]
+
+    def search(self, query, limit=None):
+        """Returns the menu items matching query, best first (see MenuSearchIndex.search)."""
+        return [self.by_id[item_id] for item_id in self.index.search(query, limit)]
+
+    def reload(self):
+        """Loads the whole menu."""
+        self.data_version = self._read_data_version()
+        # Take the log position first: a change made during the load is then
+        # applied again by the next refresh rather than missed
+        self.position = get_menu_log_position()
+        self.by_id = {item["id"]: item for item in load_menu_items()}
+        self.index.rebuild(self.by_id.values())
+        self._rebuild()
+
+    def poll(self):
+        """
+        Picks up menu changes committed by other connections, in this process
+        or another terminal sharing the database.
+        Returns:
+            bool: True if the menu changed.
+        """
+        data_version = self._read_data_version()
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        return self.refresh()
+
+    def refresh(self):
+        """
+        Applies every logged change since the last refresh, including ones made
+        through this thread's own connection, which poll() cannot see.
+        Returns:
+            bool: True if the menu changed.
+        """
+        self.position, changes = load_menu_changes(self.position)
+        changed = False
+        for item_id, item in changes.items():
+            if item is None:
+                if self.by_id.pop(item_id, None) is not None:
+                    self.index.remove(item_id)
+                    changed = True
+            elif self.by_id.get(item_id) != item:
+                self.by_id[item_id] = item
+                self.index.add(item)
+                changed = True
+        if changed:
+            self._rebuild()
+        return changed
+
+    def _rebuild(self):
+        self.items[:] = [self.by_id[item_id] for item_id in sorted(self.by_id)]
+        self.by_name = {item["name"]: item for item in self.items}
+
+    def _read_data_version(self):
+        # Changes only when another connection commits, sales included; a sale
+        # then costs one indexed menu_log lookup that finds nothing
+        return get_connection(POS_DB).execute("PRAGMA data_version").fetchone()[0]
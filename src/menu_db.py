@@ -1,77 +1,127 @@
-import sqlite3
-
-# Create the database and table
-def create_menu_db():
-    """
-    Creates the database and the menu_items table if they do not exist.
-    Adds an image_path column to store the path of images associated with menu items.
-    """
-    conn = sqlite3.connect("menu.db")  # Connect to the database (it will create if it doesn't exist)
-    cursor = conn.cursor()
-
-    # Create a table for storing menu items with an image_path column
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS menu_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            price REAL NOT NULL,
-            image_path TEXT
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
+from db import POS_DB, get_connection, transaction
+from perf import timed
 
 # Load menu items from the database
+@timed("menu_db.load_menu_items")
 def load_menu_items():
     """
-    Loads all menu items from the database, including their associated image paths.
+    Loads every item currently on the menu, including their associated image paths.
+    Items removed from the menu are kept for the sales that reference them but
+    are not returned.
     Returns:
-        list of dict: Each dict contains the name, price, and image_path of a menu item.
+        list of dict: Each dict contains the id, name, price_cents, image_path
+        and code (PLU or barcode, or None) of a menu item.
     """
-    conn = sqlite3.connect("menu.db")
-    cursor = conn.cursor()
+    conn = get_connection(POS_DB)
 
     # Fetch all items, including their image paths
-    cursor.execute("SELECT name, price, image_path FROM menu_items")
-    rows = cursor.fetchall()
+    rows = conn.execute('''SELECT id, name, price_cents, image_path, code FROM items
+                           WHERE deleted = 0 ORDER BY id''').fetchall()
 
     # Convert rows to a list of dictionaries
-    menu_items = [{"name": row[0], "price": row[1], "image_path": row[2]} for row in rows]
+    menu_items = [{"id": row[0], "name": row[1], "price_cents": row[2], "image_path": row[3], "code": row[4]}
+                  for row in rows]
 
-    conn.close()
     return menu_items
 
+# Find out how far the menu change log has got
+def get_menu_log_position():
+    """
+    Returns the sequence number of the latest menu change, 0 if there is none.
+    """
+    row = get_connection(POS_DB).execute("SELECT MAX(seq) FROM menu_log").fetchone()
+    return row[0] or 0
+
+# Load the menu items changed since a point in the change log
+@timed("menu_db.load_menu_changes")
+def load_menu_changes(since):
+    """
+    Loads the menu items that were added, edited or removed after the change
+    log position since.
+    Args:
+        since (int): Change log position returned by an earlier call or by
+            get_menu_log_position.
+    Returns:
+        tuple: (new position, dict mapping each changed item id to its item
+        dict, or to None if the item was removed)
+    """
+    conn = get_connection(POS_DB)
+    rows = conn.execute('''
+        SELECT log.seq, log.item_id, i.name, i.price_cents, i.image_path, i.code
+        FROM menu_log log LEFT JOIN items i ON i.id = log.item_id AND i.deleted = 0
+        WHERE log.seq > ?
+        ORDER BY log.seq
+    ''', (since,)).fetchall()
+
+    changes = {}
+    for seq, item_id, name, price_cents, image_path, code in rows:
+        since = seq
+        changes[item_id] = None if name is None else {
+            "id": item_id, "name": name, "price_cents": price_cents, "image_path": image_path, "code": code
+        }
+    return since, changes
+
+# Look up the item a name refers to
+def item_id_for_name(name, price_cents=0):
+    """
+    Returns the id of the menu item with the given name, preferring one still
+    on the menu. A name that was never on the menu is added as a removed item,
+    so sales recorded by name (old journals, add_order) still get an item id.
+    Args:
+        name (str): Item name.
+        price_cents (int): Price to give the item if it has to be added.
+    Returns:
+        int: The item id.
+    """
+    conn = get_connection(POS_DB)
+    row = conn.execute("SELECT id FROM items WHERE name = ? ORDER BY deleted, id DESC LIMIT 1", (name,)).fetchone()
+    if row is not None:
+        return row[0]
+    with transaction(POS_DB) as cursor:
+        cursor.execute("INSERT INTO items (name, price_cents, deleted) VALUES (?, ?, 1)", (name, price_cents))
+        return cursor.lastrowid
+
 # Add a menu item to the database
-def add_menu_item(name, price, image_path):
+@timed("menu_db.add_menu_item")
+def add_menu_item(name, price_cents, image_path, code=None):
     """
     Adds a new menu item to the database, including the image path.
     Args:
         name (str): Name of the menu item.
-        price (float): Price of the menu item.
+        price_cents (int): Price of the menu item in centavos.
         image_path (str): Path to the image associated with the menu item.
+        code (str): PLU or barcode the item can be rung up by, or None.
+    Returns:
+        int: Id of the new item.
+    Raises:
+        sqlite3.IntegrityError: If another item on the menu already has the code.
     """
-    conn = sqlite3.connect("menu.db")
-    cursor = conn.cursor()
+    with transaction(POS_DB) as cursor:
+        # Insert the menu item along with its image path
+        cursor.execute("INSERT INTO items (name, price_cents, image_path, code) VALUES (?, ?, ?, ?)",
+                       (name, price_cents, image_path, code or None))
+        return cursor.lastrowid
 
-    # Insert the menu item along with its image path
-    cursor.execute("INSERT INTO menu_items (name, price, image_path) VALUES (?, ?, ?)", (name, price, image_path))
-
-    conn.commit()
-    conn.close()
+# Add many menu items in one go
+@timed("menu_db.add_menu_items")
+def add_menu_items(items):
+    """
+    Adds several menu items in a single transaction.
+    Args:
+        items (list of tuple): (name, price_cents, image_path, code) for each item.
+    """
+    with transaction(POS_DB) as cursor:
+        cursor.executemany("INSERT INTO items (name, price_cents, image_path, code) VALUES (?, ?, ?, ?)", items)
 
 # Remove a menu item from the database
+@timed("menu_db.remove_menu_item")
 def remove_menu_item(name):
     """
-    Removes a menu item from the database by its name.
+    Takes a menu item off the menu by its name. The item row is kept, marked
+    deleted, so past sales still refer to it.
     Args:
         name (str): Name of the menu item to be removed.
     """
-    conn = sqlite3.connect("menu.db")
-    cursor = conn.cursor()
-
-    # Delete the menu item with the given name
-    cursor.execute("DELETE FROM menu_items WHERE name = ?", (name,))
-
-    conn.commit()
-    conn.close()
+    with transaction(POS_DB) as cursor:
+        # Mark the menu item with the given name as removed
+        cursor.execute("UPDATE items SET deleted = 1 WHERE name = ? AND deleted = 0", (name,))
@@ -0,0 +1,222 @@
+import os
+import sqlite3
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QLabel, QLineEdit, QMessageBox, QFileDialog
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QPixmap
+from cart import to_cents
+from image_cache import ensure_thumbnail
+from image_store import prune_images, store_image
+from menu_db import add_menu_item, remove_menu_item
+from menu_import import format_summary, import_menu
+from paths import resource_path
+
+class StoreImageSignals(QObject):
+    finished = pyqtSignal(str, str)  # Stored image path, thumbnail path
+    failed = pyqtSignal(str)
+
+
+class StoreImageTask(QRunnable):
+    """Runs store_image on the global thread pool so decoding a large photo never blocks the dialog."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = StoreImageSignals()
+
+    def run(self):
+        try:
+            stored = store_image(self.path)
+            thumbnail = ensure_thumbnail(stored) or ""
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(stored, thumbnail)
+
+
+class ImportSignals(QObject):
+    finished = pyqtSignal(dict)  # import_menu's summary
+    failed = pyqtSignal(str)
+
+
+class ImportTask(QRunnable):
+    """Runs import_menu on the global thread pool; its images are processed on worker threads."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = ImportSignals()
+
+    def run(self):
+        try:
+            summary = import_menu(self.path)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(summary)
+
+
+class ManageMenuDialog(QDialog):
+    def __init__(self, menu_cache, update_menu_callback):
+        super().__init__()
+        self.setWindowTitle("Manage Menu")
+        self.menu_cache = menu_cache
+        self.update_menu_callback = update_menu_callback
+        self.image_path = None  # To store the uploaded image path
+
+        layout = QVBoxLayout()
+
+        # Upload Image Section
+        self.upload_image_button = QPushButton("Upload Image")
+        self.upload_image_button.clicked.connect(self.upload_image)
+        layout.addWidget(self.upload_image_button)
+
+        self.image_preview = QLabel("No image uploaded")
+        self.image_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_preview.setStyleSheet("border: 1px solid gray; padding: 5px;")
+        layout.addWidget(self.image_preview)
+
+        # Add Item Section
+        self.item_name_input = QLineEdit()
+        self.item_name_input.setPlaceholderText("Enter item name")
+        self.item_price_input = QLineEdit()
+        self.item_price_input.setPlaceholderText("Enter item price")
+        self.item_code_input = QLineEdit()
+        self.item_code_input.setPlaceholderText("Enter PLU or barcode (optional)")
+
+        self.add_item_button = QPushButton("Add Item")
+        self.add_item_button.clicked.connect(self.add_item)
+
+        layout.addWidget(self.item_name_input)
+        layout.addWidget(self.item_price_input)
+        layout.addWidget(self.item_code_input)
+        layout.addWidget(self.add_item_button)
+
+        # Remove Item Section
+        self.item_remove_input = QLineEdit()
+        self.item_remove_input.setPlaceholderText("Enter item name to remove")
+        remove_item_button = QPushButton("Remove Item")
+        remove_item_button.clicked.connect(self.remove_item)
+
+        layout.addWidget(self.item_remove_input)
+        layout.addWidget(remove_item_button)
+
+        # Bulk Import Section
+        self.import_button = QPushButton("Import Menu...")
+        self.import_button.clicked.connect(self.import_items)
+        layout.addWidget(self.import_button)
+
+        self.setLayout(layout)
+
+    def upload_image(self):
+        """Stores the picked image in the image store in the background."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.gif)")
+        if not file_path:
+            return  # User canceled the dialog
+
+        task = StoreImageTask(file_path)
+        task.signals.finished.connect(self.upload_finished)
+        task.signals.failed.connect(self.upload_failed)
+        self.upload_image_button.setEnabled(False)
+        self.add_item_button.setEnabled(False)
+        self.image_preview.setText("Processing image...")
+        QThreadPool.globalInstance().start(task)
+
+    def upload_finished(self, stored_path, thumbnail_path):
+        self.upload_image_button.setEnabled(True)
+        self.add_item_button.setEnabled(True)
+        self.image_path = stored_path  # Store the path of the uploaded image
+
+        # Preview the pre-generated thumbnail rather than the full image
+        pixmap = QPixmap(thumbnail_path) if thumbnail_path else QPixmap()
+        if pixmap.isNull():
+            self.image_preview.setText(os.path.basename(stored_path))
+        else:
+            self.image_preview.setPixmap(pixmap)
+
+    def upload_failed(self, message):
+        self.upload_image_button.setEnabled(True)
+        self.add_item_button.setEnabled(True)
+        self.image_preview.setText("No image uploaded")
+        QMessageBox.critical(self, "Error", f"Failed to upload image: {message}")
+
+    def add_item(self):
+        """Adds a new item with an uploaded or default image to the menu."""
+        name = self.item_name_input.text()
+        try:
+            price_cents = to_cents(self.item_price_input.text().strip())
+        except (ArithmeticError, ValueError):
+            QMessageBox.warning(self, "Invalid Input", "Price must be a number!")
+            return
+        if price_cents < 0:
+            QMessageBox.warning(self, "Invalid Input", "Price cannot be negative!")
+            return
+        code = self.item_code_input.text().strip() or None
+        holder = self.menu_cache.find_code(code) if code else None
+        if holder is not None:
+            QMessageBox.warning(self, "Invalid Input", f"Code {code} is already used by {holder['name']}!")
+            return
+
+        # Use default image if no image is uploaded
+        if not self.image_path:
+            self.image_path = resource_path("no-image.png")
+
+            # Verify that the default image exists
+            if not os.path.exists(self.image_path):
+                QMessageBox.critical(self, "Error", "Default image (no-image.png) is missing!")
+                return
+
+        if name:
+            # Embed the image path with the menu item
+            try:
+                add_menu_item(name, price_cents, self.image_path, code)
+            except sqlite3.IntegrityError:
+                # The cached menu can be behind the database, so the unique index has the last word
+                QMessageBox.warning(self, "Invalid Input", f"Code {code} is already used by another item!")
+                return
+            QMessageBox.information(self, "Item Added", f"{name} added to menu!")
+            self.update_menu_callback()
+            self.item_name_input.clear()
+            self.item_price_input.clear()
+            self.item_code_input.clear()
+            self.image_preview.clear()
+            self.image_preview.setText("No image uploaded")
+            self.image_path = None
+        else:
+            QMessageBox.warning(self, "Invalid Input", "Item name cannot be empty!")
+
+    def remove_item(self):
+        """Removes an item from the menu."""
+        name = self.item_remove_input.text()
+        if self.menu_cache.find(name) is not None:
+            remove_menu_item(name)
+            QMessageBox.information(self, "Item Removed", f"{name} removed from menu!")
+            self.update_menu_callback()
+            self.item_remove_input.clear()
+            # Drop stored images no remaining item uses
+            prune_images(item["image_path"] for item in self.menu_cache.items)
+        else:
+            QMessageBox.warning(self, "Not Found", f"{name} not found in menu!")
+
+    def import_items(self):
+        """Adds every item listed in a CSV or JSON manifest in the background."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Menu", "", "Menu Manifests (*.csv *.json)")
+        if not file_path:
+            return  # User canceled the dialog
+
+        task = ImportTask(file_path)
+        task.signals.finished.connect(self.import_finished)
+        task.signals.failed.connect(self.import_failed)
+        self.import_button.setEnabled(False)
+        self.import_button.setText("Importing...")
+        QThreadPool.globalInstance().start(task)
+
+    def import_finished(self, summary):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Import Menu...")
+        self.update_menu_callback()
+        QMessageBox.information(self, "Import Complete", format_summary(summary))
+
+    def import_failed(self, message):
+        self.import_button.setEnabled(True)
+        self.import_button.setText("Import Menu...")
+        QMessageBox.critical(self, "Error", f"Failed to import menu: {message}")
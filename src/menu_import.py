@@ -0,0 +1,159 @@
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from cart import to_cents
+from image_store import store_image
+from menu_db import add_menu_items, load_menu_items
+from menu_search import normalize
+from perf import timed
+
+# Manifest formats import_menu understands, picked by file extension
+MANIFEST_FORMATS = (".csv", ".json")
+
+# With fewer images than this, starting worker threads costs more than it saves
+PARALLEL_IMAGE_THRESHOLD = 8
+
+
+# Read the items listed in a manifest file
+def read_manifest(path):
+    """
+    Reads a CSV file with name, price, image and code columns, or a JSON file
+    holding a list of objects with those keys (or an object with such a list
+    under "items"). The image and code (PLU or barcode) columns are optional;
+    relative image paths are resolved against the manifest's folder.
+    Args:
+        path (str): Manifest file path.
+    Returns:
+        list of dict: One dict per entry with the keys "row", "name", "price",
+        "image" and "code", exactly as written in the manifest.
+    Raises:
+        ValueError: If the file is neither CSV nor JSON, or is malformed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as manifest:
+            entries = list(csv.DictReader(manifest))
+        first_row = 2  # Row 1 is the header
+    elif extension == ".json":
+        with open(path, encoding="utf-8") as manifest:
+            entries = json.load(manifest)
+        if isinstance(entries, dict):
+            entries = entries.get("items", [])
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError("A JSON manifest must be a list of objects")
+        first_row = 1
+    else:
+        raise ValueError(f"Unsupported manifest type {extension!r}; use {' or '.join(MANIFEST_FORMATS)}")
+
+    folder = os.path.dirname(os.path.abspath(path))
+    items = []
+    for row, entry in enumerate(entries, start=first_row):
+        image = (entry.get("image") or entry.get("image_path") or "").strip()
+        items.append({
+            "row": row,
+            "name": str(entry.get("name") or "").strip(),
+            "price": entry.get("price"),
+            "image": os.path.join(folder, image) if image else None,
+            "code": str(entry.get("code") or "").strip() or None,
+        })
+    return items
+
+
+def _store_images(paths, workers):
+    # Returns {source path: (stored path or None, error message or None)}
+    results = {}
+    if len(paths) < PARALLEL_IMAGE_THRESHOLD or workers == 1:
+        for path in paths:
+            try:
+                results[path] = (store_image(path), None)
+            except Exception as e:
+                results[path] = (None, str(e))
+        return results
+
+    # Threads rather than processes: QImage decodes and scales with the GIL
+    # released, and a frozen or Qt process cannot safely start new interpreters
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(store_image, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                results[path] = (future.result(), None)
+            except Exception as e:
+                results[path] = (None, str(e))
+    return results
+
+
+# Add every item in a manifest to the menu
+@timed("menu_import.import_menu")
+def import_menu(path, workers=None):
+    """
+    Imports the items of a manifest (see read_manifest) into the menu in one
+    transaction. Referenced images are stored and thumbnailed in a pool of
+    worker threads, each distinct file once. Items whose name is already on
+    the menu are skipped, so importing the same manifest twice adds nothing
+    the second time. An item whose image cannot be used is added with the
+    placeholder image.
+    Args:
+        path (str): Manifest file path.
+        workers (int): Worker threads for images; defaults to the CPU count.
+    Returns:
+        dict: "added" (number of items added) and "problems", a list of
+        (row, name, message) tuples for skipped items and unusable images.
+    """
+    entries = read_manifest(path)
+    menu = load_menu_items()
+    existing = {item["name"] for item in menu}
+    # Codes are compared the way the search index looks them up, so "abc"
+    # cannot be added next to an existing "ABC"
+    codes = {normalize(item["code"]) for item in menu if item["code"]}
+    problems = []
+    accepted = []
+    for entry in entries:
+        name = entry["name"]
+        if not name:
+            problems.append((entry["row"], name, "missing name"))
+            continue
+        if name in existing:
+            problems.append((entry["row"], name, "already on the menu"))
+            continue
+        try:
+            price_cents = to_cents(str(entry["price"]).strip())
+        except (ArithmeticError, ValueError):
+            problems.append((entry["row"], name, f"price {entry['price']!r} is not a number"))
+            continue
+        if price_cents < 0:
+            problems.append((entry["row"], name, "price is negative"))
+            continue
+        code = normalize(entry["code"])
+        if code and code in codes:
+            problems.append((entry["row"], name, f"code {entry['code']} is already used"))
+            continue
+        existing.add(name)
+        if code:
+            codes.add(code)
+        accepted.append((entry, price_cents))
+
+    images = sorted({entry["image"] for entry, _ in accepted if entry["image"]})
+    stored = _store_images(images, workers or os.cpu_count() or 1)
+
+    rows = []
+    for entry, price_cents in accepted:
+        image_path = None
+        if entry["image"]:
+            image_path, error = stored[entry["image"]]
+            if error:
+                problems.append((entry["row"], entry["name"], f"image not used: {error}"))
+        rows.append((entry["name"], price_cents, image_path, entry["code"]))
+
+    add_menu_items(rows)
+    return {"added": len(rows), "problems": sorted(problems, key=lambda problem: problem[0])}
+
+
+# Describe an import's outcome in a few lines
+def format_summary(summary):
+    """Returns the result of import_menu as text for a message box or the console."""
+    lines = [f"{summary['added']} items added."]
+    if summary["problems"]:
+        lines.append(f"{len(summary['problems'])} problems:")
+        lines.extend(f"  row {row} {name or '(no name)'}: {message}" for row, name, message in summary["problems"])
+    return "\n".join(lines)
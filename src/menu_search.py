@@ -0,0 +1,152 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+
+# Search matches whole words of a name by prefix; terms this long or longer
+# also match anywhere inside the name, through the trigram index
+SUBSTRING_MIN_LENGTH = 3
+
+_WORD = re.compile(r"\w+")
+
+
+# Put text in the form the index compares
+def normalize(text):
+    """Returns text case-folded with runs of whitespace collapsed, so "  Pancit  CANTON" matches "pancit canton"."""
+    return " ".join((text or "").casefold().split())
+
+
+def _trigrams(text):
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+class MenuSearchIndex:
+    """
+    Finds menu items by name or code as the cashier types. Word and code
+    prefixes live in one sorted list searched with bisect; every name is also
+    broken into trigrams so a term can match mid-word ("ton" finds "Canton").
+    add() and remove() update the index in place, so a menu edit costs a few
+    list insertions instead of a rebuild.
+    """
+
+    def __init__(self, items=()):
+        self.rebuild(items)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, items):
+        """Replaces the index contents with the given menu items."""
+        self._keys = []  # Sorted (word or code, item id) pairs
+        self._trigrams = {}  # Trigram -> ids of the items whose name contains it
+        self._codes = {}  # Normalized code -> item id
+        self._entries = {}  # Item id -> (normalized name, keys, code)
+        for item in items:
+            self._keys.extend(self._insert(item))
+        self._keys.sort()
+
+    def add(self, item):
+        """Indexes a menu item, replacing what was indexed under its id before."""
+        self.remove(item["id"])
+        for key in self._insert(item):
+            insort(self._keys, key)
+
+    def remove(self, item_id):
+        """Drops an item from the index; unknown ids are ignored."""
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        name, keys, code = entry
+        for key in keys:
+            del self._keys[bisect_left(self._keys, key)]
+        for trigram in _trigrams(name):
+            ids = self._trigrams[trigram]
+            ids.discard(item_id)
+            if not ids:
+                del self._trigrams[trigram]
+        if code and self._codes.get(code) == item_id:
+            del self._codes[code]
+
+    def _insert(self, item):
+        # Records the item everywhere but in _keys, and returns its _keys entries
+        item_id = item["id"]
+        name = normalize(item["name"])
+        code = normalize(item.get("code"))
+        words = set(_WORD.findall(name))
+        if code:
+            words.add(code)
+            self._codes[code] = item_id
+        keys = [(word, item_id) for word in words]
+        self._entries[item_id] = (name, keys, code)
+        for trigram in _trigrams(name):
+            self._trigrams.setdefault(trigram, set()).add(item_id)
+        return keys
+
+    def lookup_code(self, code):
+        """Returns the id of the item with exactly this PLU or barcode, or None."""
+        return self._codes.get(normalize(code))
+
+    def _prefix_matches(self, term):
+        # Every key starting with term sorts between term and term followed by the highest code point
+        keys = self._keys
+        start = bisect_left(keys, (term,))
+        end = bisect_left(keys, (term + "\U0010ffff",), start)
+        return {item_id for _, item_id in keys[start:end]}
+
+    def _substring_matches(self, term):
+        if len(term) < SUBSTRING_MIN_LENGTH:
+            return set()
+        # Intersect the rarest trigrams first; what survives may still have
+        # them out of order, so confirm against the name
+        groups = sorted((self._trigrams.get(trigram, set()) for trigram in _trigrams(term)), key=len)
+        candidates = set(groups[0])
+        for group in groups[1:]:
+            candidates &= group
+            if not candidates:
+                break
+        return {item_id for item_id in candidates if term in self._entries[item_id][0]}
+
+    def search(self, query, limit=None):
+        """
+        Finds the items matching every word of a query.
+        Args:
+            query (str): Text typed or scanned by the cashier.
+            limit (int): Maximum number of ids to return; None for all.
+        Returns:
+            list of int: Matching item ids, best first: an exact code, then
+            names starting with the query, then names with a word starting with
+            each term, then names containing the terms elsewhere; ties by name.
+        """
+        text = normalize(query)
+        terms = _WORD.findall(text)
+        code_match = self._codes.get(text)
+        if not terms:
+            return [] if code_match is None else [code_match]
+
+        matches = word_matches = None
+        for term in terms:
+            prefixed = self._prefix_matches(term)
+            found = prefixed | self._substring_matches(term)
+            matches = found if matches is None else matches & found
+            word_matches = prefixed if word_matches is None else word_matches & prefixed
+            if not matches:
+                break
+        if code_match is not None:
+            matches.add(code_match)
+
+        entries = self._entries
+
+        def rank(item_id):
+            name = entries[item_id][0]
+            if item_id == code_match:
+                tier = 0
+            elif name.startswith(text):
+                tier = 1
+            elif item_id in word_matches:
+                tier = 2
+            else:
+                tier = 3
+            return tier, name, item_id
+
+        if limit is None:
+            return sorted(matches, key=rank)
+        return heapq.nsmallest(limit, matches, key=rank)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The bundled res/ folder: PyInstaller's bundle directory when frozen (it works for
+# both one-file and one-dir builds), the folder next to src/ when run as a script
+if getattr(sys, 'frozen', False):
+    RES_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(sys.executable)), "res")
+else:
+    RES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "res")
+
+
+# Build the path of a file in the res folder
+def resource_path(file_name):
+    """
+    Returns the path of a bundled resource.
+    Args:
+        file_name (str): File name inside res/, e.g. "logo.png".
+    Returns:
+        str: Path of the resource.
+    """
+    return os.path.join(RES_DIR, file_name)
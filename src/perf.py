@@ -0,0 +1,148 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+# Instrumentation is off unless PASTILAN_PERF=1 is set or enable() is called
+_enabled = os.environ.get("PASTILAN_PERF") == "1"
+_lock = threading.Lock()
+_stats = {}
+_local = threading.local()
+
+
+class _SiteStats:
+    __slots__ = ("calls", "queries", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKET_BOUNDS_MS)
+
+
+def _site(name):
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = _SiteStats()
+    return stats
+
+
+# Turn the instrumentation on or off
+def enable(flag=True):
+    """
+    Turns timing and query counting on or off. Query counting only covers
+    connections opened after it is turned on, so enable it at startup.
+    """
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+# Wrap a function so its calls are timed under a call-site name
+def timed(name):
+    """
+    Decorator recording the latency of each call, and the SQL statements it
+    runs, under the given call-site name. Costs one flag check when disabled.
+    Args:
+        name (str): Call-site name shown in the performance panel.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            stack.append(name)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                stack.pop()
+                record(name, elapsed_ms)
+        return wrapper
+    return decorator
+
+
+# Record one timed call
+def record(name, elapsed_ms):
+    """Adds one call of elapsed_ms to a call site's histogram."""
+    with _lock:
+        stats = _site(name)
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+
+
+def _count_statement(statement):
+    # Attribute each statement to the innermost timed call on this thread
+    stack = getattr(_local, "stack", None)
+    name = stack[-1] if stack else "(untimed)"
+    with _lock:
+        _site(name).queries += 1
+
+
+# Count the statements a connection runs
+def attach_connection(conn):
+    """Counts every statement run on conn against the active call site, if enabled."""
+    if _enabled:
+        conn.set_trace_callback(_count_statement)
+
+
+def _percentile(stats, fraction):
+    # Estimate a percentile as the upper bound of the bucket it falls in
+    target = stats.calls * fraction
+    seen = 0
+    for bound, count in zip(BUCKET_BOUNDS_MS, stats.buckets):
+        seen += count
+        if count and seen >= target:
+            return min(bound, stats.max_ms)
+    return stats.max_ms
+
+
+# Read the collected numbers
+def snapshot():
+    """
+    Returns the statistics collected so far.
+    Returns:
+        dict: Per call site: calls, queries, mean/p50/p95/max latency in ms, and
+        the histogram as {bucket upper bound in ms: calls}.
+    """
+    with _lock:
+        report = {}
+        for name, stats in sorted(_stats.items()):
+            report[name] = {
+                "calls": stats.calls,
+                "queries": stats.queries,
+                "mean_ms": round(stats.total_ms / stats.calls, 4) if stats.calls else 0.0,
+                "p50_ms": round(_percentile(stats, 0.5), 4),
+                "p95_ms": round(_percentile(stats, 0.95), 4),
+                "max_ms": round(stats.max_ms, 4),
+                "histogram": {str(bound): count for bound, count in zip(BUCKET_BOUNDS_MS, stats.buckets) if count},
+            }
+        return report
+
+
+# Forget everything collected so far
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+# Write the collected numbers to a file
+def export_json(path):
+    """Writes snapshot() to path as JSON."""
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(snapshot(), output, indent=2)
@@ -0,0 +1,69 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer
+import perf
+
+PERF_COLUMNS = ["Call Site", "Calls", "Queries", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+
+
+class PerfPanel(QDialog):
+    """Shows the latency and query counts collected by perf, refreshed every second."""
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Performance")
+        self.resize(800, 400)
+
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(PERF_COLUMNS))
+        self.table.setHorizontalHeaderLabels(PERF_COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 260)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+
+        export_button = QPushButton("Export JSON")
+        export_button.clicked.connect(self.export)
+        buttons.addWidget(export_button)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        """Redraws the table from the latest numbers."""
+        report = perf.snapshot()
+        self.table.setRowCount(len(report))
+        for row, (name, stats) in enumerate(report.items()):
+            values = [name, stats["calls"], stats["queries"], stats["mean_ms"],
+                      stats["p50_ms"], stats["p95_ms"], stats["max_ms"]]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if column:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset(self):
+        """Clears the collected numbers."""
+        perf.reset()
+        self.refresh()
+
+    def export(self):
+        """Saves the collected numbers as JSON."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Performance Data", "perf.json", "JSON Files (*.json)")
+        if not file_path:
+            return  # User canceled the dialog
+        try:
+            perf.export_json(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to export performance data: {str(e)}")
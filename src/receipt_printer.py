@@ -0,0 +1,78 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from receipts import spool_receipt, spool_z_report
+
+# Printouts rendered and spooled at once; a slow printer ties up these
+# threads, never the GUI thread or the shared global pool
+PRINT_WORKERS = 2
+
+# How long closing the register waits for printouts still queued, in ms
+STOP_TIMEOUT_MS = 10_000
+
+
+class PrintSignals(QObject):
+    finished = pyqtSignal(str, str)  # Printout kind, spooled file path
+    failed = pyqtSignal(str, str)  # Printout kind, error message
+
+
+class PrintTask(QRunnable):
+    """Renders and spools one printout on the print pool."""
+
+    def __init__(self, kind, spool_function, argument):
+        super().__init__()
+        self.kind = kind
+        self.spool_function = spool_function
+        self.argument = argument
+        self.signals = PrintSignals()
+
+    def run(self):
+        try:
+            path = self.spool_function(self.argument)
+        except Exception as e:
+            self.signals.failed.emit(self.kind, str(e))
+        else:
+            self.signals.finished.emit(self.kind, path)
+
+
+class ReceiptPrinter(QObject):
+    """
+    Prints receipts and end-of-day reports on a pool of worker threads. The
+    caller hands over plain data and returns at once; printed or failed is
+    emitted on the GUI thread when the printout is spooled.
+    """
+
+    # Emitted with the printout kind ("receipt" or "z-report") and the spooled file
+    printed = pyqtSignal(str, str)
+    # Emitted with the printout kind and the error
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(PRINT_WORKERS)
+
+    def print_receipt(self, sale):
+        """
+        Queues a sale's receipt.
+        Args:
+            sale (dict): "uid", "date", "total_cents" and "lines", a list of
+                (name, quantity, price_cents, total_cents) tuples. It is read on
+                another thread, so pass a copy nothing else changes.
+        """
+        self._start(PrintTask("receipt", spool_receipt, sale))
+
+    def print_z_report(self, day):
+        """
+        Queues the end-of-day report of a day.
+        Args:
+            day (str): Date as "YYYY-MM-DD".
+        """
+        self._start(PrintTask("z-report", spool_z_report, day))
+
+    def _start(self, task):
+        task.signals.finished.connect(self.printed)
+        task.signals.failed.connect(self.failed)
+        self.pool.start(task)
+
+    def stop(self, timeout_ms=STOP_TIMEOUT_MS):
+        """Waits for queued printouts to be spooled."""
+        self.pool.waitForDone(timeout_ms)
@@ -0,0 +1,255 @@
+import os
+import re
+from datetime import datetime
+from db import db_path
+from inventory_viewer import get_item_totals_between, get_period_range, query_sale_lines
+from perf import timed
+
+# Where receipts and reports are written for the printer to pick up; the
+# "spool" folder in the data directory unless PASTILAN_SPOOL_DIR is set
+SPOOL_DIR = os.environ.get("PASTILAN_SPOOL_DIR")
+DEFAULT_SPOOL_DIR = "spool"
+
+# Extension of spooled files: raw ESC/POS, sent to the printer as-is
+SPOOL_SUFFIX = ".prn"
+
+# Characters per printed line; 42 fits 80 mm paper in the printer's small font
+RECEIPT_WIDTH = int(os.environ.get("PASTILAN_RECEIPT_WIDTH", "42"))
+
+# Name printed at the top of every receipt and report
+STORE_NAME = os.environ.get("PASTILAN_STORE_NAME", "Pastilan")
+
+# ESC/POS printers start in code page 437; characters outside it print as "?"
+TEXT_ENCODING = "cp437"
+
+# ESC/POS commands the templates can use as <tag>
+COMMANDS = {
+    "init": b"\x1b@",  # ESC @: reset the printer
+    "left": b"\x1ba\x00",  # ESC a n: alignment
+    "center": b"\x1ba\x01",
+    "right": b"\x1ba\x02",
+    "b": b"\x1bE\x01",  # ESC E n: bold on and off
+    "/b": b"\x1bE\x00",
+    "big": b"\x1d!\x11",  # GS ! n: double width and height, and back
+    "/big": b"\x1d!\x00",
+    "cut": b"\x1dVA\x03",  # GS V A n: feed n lines, then cut
+}
+
+_TOKEN = re.compile(r"<(/?\w+)>|\{(\w+)(?::([^{}]*))?\}")
+
+
+def _encode(text):
+    return text.encode(TEXT_ENCODING, "replace")
+
+
+class Template:
+    """
+    A printout layout compiled once into ESC/POS bytes. The layout is text with
+    {field:spec} placeholders, formatted as str.format would, and <tag> printer
+    commands from COMMANDS. Literal text and commands are encoded when the
+    template is built, so rendering only formats the fields and joins bytes.
+    """
+
+    def __init__(self, text):
+        self.parts = []  # bytes, or (field, format spec) tuples
+        position = 0
+        for match in _TOKEN.finditer(text):
+            self._add(_encode(text[position:match.start()]))
+            tag, field, spec = match.groups()
+            if tag is not None:
+                if tag not in COMMANDS:
+                    raise ValueError(f"Unknown printer command <{tag}>")
+                self._add(COMMANDS[tag])
+            else:
+                self.parts.append((field, spec or ""))
+            position = match.end()
+        self._add(_encode(text[position:]))
+
+    def _add(self, chunk):
+        # Merge neighbouring constant chunks so render joins as few parts as possible
+        if not chunk:
+            return
+        if self.parts and isinstance(self.parts[-1], bytes):
+            self.parts[-1] += chunk
+        else:
+            self.parts.append(chunk)
+
+    def render(self, values):
+        """
+        Fills the template in.
+        Args:
+            values (dict): Value of each field.
+        Returns:
+            bytes: The ESC/POS byte stream.
+        """
+        return b"".join(
+            part if isinstance(part, bytes) else _encode(format(values[part[0]], part[1]))
+            for part in self.parts
+        )
+
+
+def format_amount(cents):
+    """Formats centavos for a printout, e.g. 123450 -> "1,234.50"; the peso sign is not in the printer's code page."""
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100:,}.{cents % 100:02d}"
+
+
+_RULE = "-" * RECEIPT_WIDTH
+_NAME_WIDTH = RECEIPT_WIDTH - 18
+_VALUE_WIDTH = 16
+
+# Item rows of receipts and reports: name, quantity, line total
+_ITEM_LINE = Template(f"{{name:<{_NAME_WIDTH}.{_NAME_WIDTH}}}{{quantity:>5}}{{total:>13}}\n")
+# Label and value, e.g. "Sales      57"
+_VALUE_LINE = Template(f"{{label:<{RECEIPT_WIDTH - _VALUE_WIDTH}}}{{value:>{_VALUE_WIDTH}}}\n")
+
+_RECEIPT_HEADER = Template(
+    "<init><center><b><big>{store}</big></b>\n"
+    "{date}\n"
+    "Ref {ref}\n"
+    f"<left>{_RULE}\n"
+)
+_RECEIPT_UNIT_PRICE = Template("  @ {price}\n")
+_RECEIPT_TOTAL = Template(
+    f"{_RULE}\n"
+    f"<b>{{label:<{RECEIPT_WIDTH - _VALUE_WIDTH}}}{{value:>{_VALUE_WIDTH}}}</b>\n"
+)
+_RECEIPT_FOOTER = Template("\n<center>Thank you, come again!\n<cut>")
+
+_REPORT_HEADER = Template(
+    "<init><center><b><big>{store}</big></b>\n"
+    "<b>END OF DAY REPORT</b>\n"
+    "{day}\n"
+    f"<left>{_RULE}\n"
+)
+_REPORT_RULE = Template(f"{_RULE}\n")
+_REPORT_FOOTER = Template("\nPrinted {printed}\n<cut>")
+
+
+# Lay out a customer receipt
+def render_receipt(sale):
+    """
+    Renders the receipt of a sale.
+    Args:
+        sale (dict): "uid", "date", "total_cents" and "lines", a list of
+            (name, quantity, price_cents, total_cents) tuples.
+    Returns:
+        bytes: ESC/POS byte stream.
+    """
+    chunks = [_RECEIPT_HEADER.render({"store": STORE_NAME, "date": sale["date"], "ref": sale["uid"][:12].upper()})]
+    for name, quantity, price_cents, total_cents in sale["lines"]:
+        chunks.append(_ITEM_LINE.render({"name": name, "quantity": quantity, "total": format_amount(total_cents)}))
+        if quantity > 1:
+            chunks.append(_RECEIPT_UNIT_PRICE.render({"price": format_amount(price_cents)}))
+    chunks.append(_RECEIPT_TOTAL.render({"label": "TOTAL PHP", "value": format_amount(sale["total_cents"])}))
+    chunks.append(_RECEIPT_FOOTER.render({}))
+    return b"".join(chunks)
+
+
+# Gather what the end-of-day report shows
+@timed("receipts.load_day_summary")
+def load_day_summary(day):
+    """
+    Reads the sales of one day.
+    Args:
+        day (str): Date as "YYYY-MM-DD".
+    Returns:
+        dict: "day"; "sales", the number of sales; "first_sale" and
+        "last_sale", their ids (None without sales); "items", a list of
+        (name, quantity, total_cents) best sellers first; and "total_cents".
+    """
+    start, end = get_period_range(day)
+    cursor = query_sale_lines(["l.sale_id"], start, end)
+    try:
+        sale_ids = {row[0] for row in cursor}
+    finally:
+        cursor.close()
+    items = [(name, quantity, total_cents) for _, name, quantity, total_cents in get_item_totals_between(start, end)]
+    return {
+        "day": day,
+        "sales": len(sale_ids),
+        "first_sale": min(sale_ids, default=None),
+        "last_sale": max(sale_ids, default=None),
+        "items": items,
+        "total_cents": sum(total_cents for _, _, total_cents in items),
+    }
+
+
+# Lay out the end-of-day (Z) report
+def render_z_report(summary, printed=None):
+    """
+    Renders an end-of-day report.
+    Args:
+        summary (dict): As returned by load_day_summary.
+        printed (str): Time printed on the report; defaults to now.
+    Returns:
+        bytes: ESC/POS byte stream.
+    """
+    chunks = [_REPORT_HEADER.render({"store": STORE_NAME, "day": summary["day"]})]
+    chunks.append(_VALUE_LINE.render({"label": "Sales", "value": summary["sales"]}))
+    if summary["sales"]:
+        chunks.append(_VALUE_LINE.render({"label": "Sale numbers",
+                                          "value": f"{summary['first_sale']}-{summary['last_sale']}"}))
+    chunks.append(_REPORT_RULE.render({}))
+    for name, quantity, total_cents in summary["items"]:
+        chunks.append(_ITEM_LINE.render({"name": name, "quantity": quantity, "total": format_amount(total_cents)}))
+    chunks.append(_RECEIPT_TOTAL.render({"label": "TOTAL PHP", "value": format_amount(summary["total_cents"])}))
+    printed = printed or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    chunks.append(_REPORT_FOOTER.render({"printed": printed}))
+    return b"".join(chunks)
+
+
+def spool_dir():
+    """Returns the folder printouts are written to."""
+    return SPOOL_DIR or db_path(DEFAULT_SPOOL_DIR)
+
+
+# Hand a printout to the printer
+def spool(data, name):
+    """
+    Writes a printout to the spool folder under a temporary name and renames it
+    once it is complete, so whatever feeds the printer never sees half a file.
+    Args:
+        data (bytes): ESC/POS byte stream.
+        name (str): File name without SPOOL_SUFFIX.
+    Returns:
+        str: Path of the spooled file.
+    """
+    folder = spool_dir()
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name + SPOOL_SUFFIX)
+    partial = path + ".tmp"
+    with open(partial, "wb") as output:
+        output.write(data)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(partial, path)
+    return path
+
+
+# Print the receipt of a sale
+@timed("receipts.spool_receipt")
+def spool_receipt(sale):
+    """
+    Renders a sale's receipt (see render_receipt) and spools it.
+    Returns:
+        str: Path of the spooled file.
+    """
+    stamp = re.sub(r"\D", "", sale["date"])
+    return spool(render_receipt(sale), f"receipt-{stamp}-{sale['uid'][:12]}")
+
+
+# Print the end-of-day report of a day
+@timed("receipts.spool_z_report")
+def spool_z_report(day):
+    """
+    Renders the end-of-day report of a day (see render_z_report) and spools it.
+    Args:
+        day (str): Date as "YYYY-MM-DD".
+    Returns:
+        str: Path of the spooled file.
+    """
+    printed = datetime.now()
+    data = render_z_report(load_day_summary(day), printed.strftime("%Y-%m-%d %H:%M:%S"))
+    return spool(data, f"zreport-{day}-{printed.strftime('%H%M%S')}")
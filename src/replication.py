@@ -0,0 +1,298 @@
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from db import POS_DB, get_connection, transaction
+from perf import timed
+
+# Directory holding the central store shared by every register, e.g. a mounted
+# network folder; replication is off when it is not set
+CENTRAL_DIR = os.environ.get("PASTILAN_CENTRAL_DIR")
+
+# File name of the central store inside CENTRAL_DIR
+CENTRAL_DB = "central.db"
+
+# Name this register reports under; a random id is generated and kept if unset
+TERMINAL_ID = os.environ.get("PASTILAN_TERMINAL_ID")
+
+# Sales shipped per central transaction
+REPLICATION_BATCH_SIZE = 500
+
+# How often, in milliseconds, the register ships new sales
+REPLICATION_INTERVAL_MS = 60_000
+
+# Seconds to wait for another register's write to the central store
+CENTRAL_TIMEOUT = 30.0
+
+
+def is_configured():
+    """Returns True if a central store has been set up for this register."""
+    return bool(CENTRAL_DIR)
+
+
+# Work out which terminal this database belongs to
+def get_terminal_id(conn=None):
+    """
+    Returns this register's terminal id. PASTILAN_TERMINAL_ID wins when set;
+    otherwise an id is generated the first time and stored in the database.
+    """
+    conn = conn or get_connection(POS_DB)
+    row = conn.execute("SELECT terminal_id FROM replication_state WHERE id = 1").fetchone()
+    if TERMINAL_ID:
+        if row is None or row[0] != TERMINAL_ID:
+            with transaction(POS_DB) as cursor:
+                cursor.execute('''INSERT INTO replication_state (id, terminal_id) VALUES (1, ?)
+                                  ON CONFLICT (id) DO UPDATE SET terminal_id = excluded.terminal_id''',
+                               (TERMINAL_ID,))
+        return TERMINAL_ID
+    if row is not None:
+        return row[0]
+    terminal_id = uuid.uuid4().hex[:12]
+    with transaction(POS_DB) as cursor:
+        cursor.execute("INSERT OR IGNORE INTO replication_state (id, terminal_id) VALUES (1, ?)", (terminal_id,))
+    return get_terminal_id(conn)
+
+
+# Find the newest local sale the central store is known to hold
+def get_shipped_through(conn=None):
+    """
+    Returns the id of the newest sale confirmed shipped to the central store,
+    0 if none has been. Sales up to this id may be archived locally.
+    """
+    conn = conn or get_connection(POS_DB)
+    row = conn.execute("SELECT shipped_through FROM replication_state WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def _set_shipped_through(sale_id):
+    with transaction(POS_DB) as cursor:
+        cursor.execute("UPDATE replication_state SET shipped_through = max(shipped_through, ?) WHERE id = 1",
+                       (sale_id,))
+
+
+def _create_central_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            terminal_id TEXT NOT NULL,
+            sale_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            uid TEXT,
+            PRIMARY KEY (terminal_id, sale_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sale_lines (
+            terminal_id TEXT NOT NULL,
+            line_id INTEGER NOT NULL,
+            sale_id INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price_cents INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            PRIMARY KEY (terminal_id, line_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sale_lines_sale ON sale_lines(terminal_id, sale_id)")
+    # The same rollup as each register keeps, per terminal, so consolidated
+    # reports read O(days x items) rows. Item ids are local to each register,
+    # so the central store keys items by name.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_item_totals (
+            day TEXT NOT NULL,
+            terminal_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, terminal_id, item_name)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migrate_central_v1(conn):
+    # Stores from the first replicating version kept amounts as REAL pesos in
+    # total and price columns; set those tables aside and copy them over
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(sales)")]
+    pesos = "total" in columns
+    if pesos:
+        # Indexes keep their names when their table is renamed
+        conn.execute("DROP INDEX IF EXISTS idx_sales_date")
+        conn.execute("DROP INDEX IF EXISTS idx_sale_lines_sale")
+        for table in ("sales", "sale_lines", "daily_item_totals"):
+            conn.execute(f"ALTER TABLE {table} RENAME TO old_{table}")
+    _create_central_tables(conn)
+    if not pesos:
+        return
+
+    conn.execute('''INSERT INTO sales (terminal_id, sale_id, date, total_cents, uid)
+                    SELECT terminal_id, sale_id, date, CAST(round(total * 100) AS INTEGER), uid
+                    FROM old_sales''')
+    conn.execute('''INSERT INTO sale_lines (terminal_id, line_id, sale_id, item_name, quantity, price_cents, total_cents)
+                    SELECT terminal_id, line_id, sale_id, item_name, quantity,
+                           CAST(round(price * 100) AS INTEGER), CAST(round(total * 100) AS INTEGER)
+                    FROM old_sale_lines''')
+    # The central store never archives, so the rollup is rebuilt exactly from the lines
+    conn.execute('''INSERT INTO daily_item_totals (day, terminal_id, item_name, quantity, total_cents)
+                    SELECT substr(s.date, 1, 10), l.terminal_id, l.item_name, SUM(l.quantity), SUM(l.total_cents)
+                    FROM sale_lines l JOIN sales s ON s.terminal_id = l.terminal_id AND s.sale_id = l.sale_id
+                    GROUP BY substr(s.date, 1, 10), l.terminal_id, l.item_name''')
+    for table in ("sales", "sale_lines", "daily_item_totals"):
+        conn.execute(f"DROP TABLE old_{table}")
+
+
+# Central store schema changes in order; CENTRAL_MIGRATIONS[n] takes the file
+# from version n to n + 1 inside one transaction
+CENTRAL_MIGRATIONS = [
+    _migrate_central_v1,
+]
+
+# Version the central store is migrated to; stored in PRAGMA user_version
+CENTRAL_SCHEMA_VERSION = len(CENTRAL_MIGRATIONS)
+
+
+# Open the central store, creating or upgrading its tables on first use
+def open_central(central_dir=None):
+    """
+    Opens the central store in central_dir (CENTRAL_DIR by default), bringing
+    its tables up to CENTRAL_SCHEMA_VERSION first, so a store written by an
+    older version keeps working. It keeps a rollback journal rather than WAL,
+    since WAL does not work when the registers reach the file through a
+    network share.
+    Returns:
+        sqlite3.Connection: A new connection the caller closes.
+    """
+    central_dir = central_dir or CENTRAL_DIR
+    if not central_dir:
+        raise RuntimeError("No central store configured; set PASTILAN_CENTRAL_DIR")
+    os.makedirs(central_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(central_dir, CENTRAL_DB), timeout=CENTRAL_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        while version < CENTRAL_SCHEMA_VERSION:
+            # Another register may be migrating too; re-read under the write lock
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < CENTRAL_SCHEMA_VERSION:
+                    CENTRAL_MIGRATIONS[version](conn)
+                    version += 1
+                    conn.execute(f"PRAGMA user_version = {version}")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _ship_batch(central, terminal_id, sales, lines):
+    # One central transaction per batch. The watermark is read under the write
+    # lock, so a batch that was already shipped, wholly or in part, is skipped
+    # rather than counted twice.
+    central.execute("BEGIN IMMEDIATE")
+    try:
+        shipped = central.execute("SELECT COALESCE(MAX(sale_id), 0) FROM sales WHERE terminal_id = ?",
+                                  (terminal_id,)).fetchone()[0]
+        sales = [sale for sale in sales if sale[0] > shipped]
+        lines = [line for line in lines if line[1] > shipped]
+        central.executemany("INSERT INTO sales (terminal_id, sale_id, date, total_cents, uid) VALUES (?, ?, ?, ?, ?)",
+                            [(terminal_id, *sale) for sale in sales])
+        central.executemany('''INSERT INTO sale_lines (terminal_id, line_id, sale_id, item_name, quantity,
+                                                     price_cents, total_cents)
+                               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                            [(terminal_id, *line) for line in lines])
+
+        dates = {sale[0]: sale[1][:10] for sale in sales}
+        rollup = {}
+        for line_id, sale_id, item_name, quantity, price, total in lines:
+            key = (dates[sale_id], item_name)
+            quantity_sum, total_sum = rollup.get(key, (0, 0))
+            rollup[key] = (quantity_sum + quantity, total_sum + total)
+        central.executemany('''
+            INSERT INTO daily_item_totals (day, terminal_id, item_name, quantity, total_cents) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (day, terminal_id, item_name) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                total_cents = total_cents + excluded.total_cents
+        ''', [(day, terminal_id, item_name, quantity, total)
+              for (day, item_name), (quantity, total) in rollup.items()])
+        central.execute("COMMIT")
+    except BaseException:
+        central.execute("ROLLBACK")
+        raise
+    return len(sales)
+
+
+# Ship the sales the central store does not have yet
+@timed("replication.replicate")
+def replicate(central_dir=None, batch_size=REPLICATION_BATCH_SIZE):
+    """
+    Copies every local sale newer than the central store's watermark for this
+    terminal, batch_size sales per central transaction. The watermark lives in
+    the central store, so a run cut short by an outage resumes where the last
+    committed batch ended, and running it twice ships nothing twice.
+    Args:
+        central_dir (str): Central store directory; defaults to CENTRAL_DIR.
+        batch_size (int): Sales per central transaction.
+    Returns:
+        int: Number of sales shipped.
+    """
+    conn = get_connection(POS_DB)
+    terminal_id = get_terminal_id(conn)
+    shipped_total = 0
+    with closing(open_central(central_dir)) as central:
+        watermark = central.execute("SELECT COALESCE(MAX(sale_id), 0) FROM sales WHERE terminal_id = ?",
+                                    (terminal_id,)).fetchone()[0]
+        _set_shipped_through(watermark)
+        while True:
+            sales = conn.execute('''SELECT id, date, total_cents, uid FROM sales
+                                    WHERE id > ? ORDER BY id LIMIT ?''', (watermark, batch_size)).fetchall()
+            if not sales:
+                break
+            last = sales[-1][0]
+            lines = conn.execute('''SELECT l.id, l.sale_id, i.name, l.quantity, l.price_cents, l.total_cents
+                                    FROM sale_lines l JOIN items i ON i.id = l.item_id
+                                    WHERE l.sale_id > ? AND l.sale_id <= ? ORDER BY l.id''',
+                                 (watermark, last)).fetchall()
+            shipped_total += _ship_batch(central, terminal_id, sales, lines)
+            watermark = last
+            _set_shipped_through(watermark)
+    return shipped_total
+
+
+# Consolidated per-item totals across every register
+def central_item_totals(start=None, end=None, central_dir=None):
+    """
+    Returns quantity and revenue per item across all terminals from start up
+    to, but not including, end, read from the central rollup.
+    Returns:
+        list of tuple: (item_name, quantity, total_cents), best sellers first.
+    """
+    from inventory_viewer import range_clause  # Imported here: archive imports this module
+    where, params = range_clause("day", start, end)
+    with closing(open_central(central_dir)) as central:
+        return central.execute(f'''
+            SELECT item_name, SUM(quantity), SUM(total_cents) FROM daily_item_totals {where}
+            GROUP BY item_name ORDER BY SUM(total_cents) DESC
+        ''', params).fetchall()
+
+
+# Consolidated revenue of each register
+def central_terminal_totals(start=None, end=None, central_dir=None):
+    """
+    Returns the sale count and revenue of each terminal from start up to, but
+    not including, end.
+    Returns:
+        list of tuple: (terminal_id, sale count, total_cents), by terminal id.
+    """
+    from inventory_viewer import range_clause
+    where, params = range_clause("date", start, end)
+    with closing(open_central(central_dir)) as central:
+        return central.execute(f'''
+            SELECT terminal_id, COUNT(*), COALESCE(SUM(total_cents), 0) FROM sales {where}
+            GROUP BY terminal_id ORDER BY terminal_id
+        ''', params).fetchall()
+
@@ -0,0 +1,205 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from PyQt6.QtCore import QObject, pyqtSignal
+from db import db_path
+from cart import to_cents
+from inventory_db import record_sales, sale_timestamp
+from menu_db import item_id_for_name
+
+# Journal of sales accepted at the register but not yet in the database
+JOURNAL_FILE = "pending_sales.jsonl"
+
+# Most sales written in one transaction
+BATCH_SIZE = 50
+
+# Sales that could never be stored, kept with their error for someone to look at
+DEAD_LETTER_FILE = "failed_sales.jsonl"
+
+# Seconds to wait before retrying a batch the database was too busy to take
+RETRY_DELAY = 2.0
+
+# Seconds stop() waits for queued sales to be stored; whatever is left stays
+# in the journal and is stored on the next start
+STOP_TIMEOUT = 10.0
+
+_STOP = object()
+
+
+def _upgrade_line(line):
+    # Journals written before the unified schema hold (item_name, quantity, price, total)
+    if not isinstance(line[0], str):
+        return line
+    item_name, quantity, price, total = line
+    price_cents = to_cents(price)
+    return [item_id_for_name(item_name, price_cents), quantity, price_cents, to_cents(total)]
+
+
+def _is_transient(error):
+    # Another connection holding the write lock clears up by itself; anything
+    # else (a constraint, bad data, a full disk) fails the same way every time
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+class SaleWriter(QObject):
+    """
+    Saves completed sales on a background thread so checkout never waits for
+    the disk. Each sale is appended to a local journal before it is queued,
+    and the writer thread stores queued sales in batches of up to BATCH_SIZE
+    per transaction. Sales still in the journal at startup (after a crash or
+    power loss) are queued again; their uid keeps them from being stored twice.
+    A sale that fails for any reason other than a busy database is moved to
+    DEAD_LETTER_FILE instead of being retried, so it cannot hold up the rest.
+    """
+
+    # Emitted with the sale uid once the sale is stored
+    sale_saved = pyqtSignal(str)
+    # Emitted with the sale uid and the error when storing it failed, saying
+    # whether it will be retried or was moved to the dead-letter file
+    sale_failed = pyqtSignal(str, str)
+
+    def __init__(self, journal_path=None, batch_size=BATCH_SIZE, parent=None):
+        super().__init__(parent)
+        self.journal_path = journal_path or db_path(JOURNAL_FILE)
+        self.dead_letter_path = db_path(DEAD_LETTER_FILE)
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        # Queue whatever a previous run accepted but never stored
+        for sale in self._read_journal():
+            self._queue.put(sale)
+            self._unsaved += 1
+
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="sale-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, lines):
+        """
+        Accepts a completed sale for saving and returns at once.
+        Args:
+            lines (list of tuple): (item_id, quantity, price_cents, total_cents) for each item sold.
+        Returns:
+            dict: The sale as recorded: its "uid", its "date" and its "lines".
+            The writer thread still reads it, so treat it as read-only.
+        """
+        sale = {"uid": uuid.uuid4().hex, "date": sale_timestamp(), "lines": [list(line) for line in lines]}
+        with self._lock:
+            self._journal.write(json.dumps(sale) + "\n")
+            # Flushed to the OS here; the writer thread fsyncs before each batch
+            self._journal.flush()
+            self._unsaved += 1
+        self._queue.put(sale)
+        return sale
+
+    def pending_count(self):
+        """Returns how many accepted sales are not stored yet."""
+        with self._lock:
+            return self._unsaved
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stores everything still queued, then stops the writer thread.
+        Args:
+            timeout (float): Seconds to wait, or None to wait until done. Sales
+                not stored by then are still in the journal.
+        Returns:
+            bool: True if every queued sale was handled.
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False  # Still retrying; the daemon thread keeps the journal open
+        with self._lock:
+            self._journal.close()
+        return True
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        sales = []
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    sale = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash was never acknowledged; skip it
+                    continue
+                sale["lines"] = [_upgrade_line(sale_line) for sale_line in sale["lines"]]
+                sales.append(sale)
+        return sales
+
+    def _next_batch(self):
+        # Block for the first sale, then take whatever else is already waiting
+        batch = [self._queue.get()]
+        while batch[-1] is not _STOP and len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = self._next_batch()
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+            if batch:
+                self._save(batch)
+
+    def _save(self, batch):
+        with self._lock:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        try:
+            self._store(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                # Store the sales one at a time so only the bad one is set aside
+                for sale in batch:
+                    self._save([sale])
+                return
+            self._dead_letter(batch[0], e)
+            self._handled(batch, saved=False)
+        else:
+            self._handled(batch, saved=True)
+
+    def _store(self, batch):
+        # Retries while the database is busy; any other error is raised
+        while True:
+            try:
+                record_sales([(sale["lines"], sale["date"], sale["uid"]) for sale in batch])
+                return
+            except Exception as e:
+                if not _is_transient(e):
+                    raise
+                for sale in batch:
+                    self.sale_failed.emit(sale["uid"], f"{e}; retrying")
+                time.sleep(RETRY_DELAY)
+
+    def _dead_letter(self, sale, error):
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letters:
+            dead_letters.write(json.dumps({"sale": sale, "error": str(error)}) + "\n")
+            dead_letters.flush()
+            os.fsync(dead_letters.fileno())
+        self.sale_failed.emit(sale["uid"], f"{error}; moved to {DEAD_LETTER_FILE}")
+
+    def _handled(self, batch, saved):
+        with self._lock:
+            self._unsaved -= len(batch)
+            # Everything accepted so far is stored or set aside: the journal can start over
+            if self._unsaved == 0:
+                self._journal.truncate(0)
+                self._journal.seek(0)
+        if saved:
+            for sale in batch:
+                self.sale_saved.emit(sale["uid"])
@@ -0,0 +1,59 @@
+import csv
+import json
+import os
+from inventory_viewer import SALE_LINE_COLUMNS, iter_sale_line_chunks
+
+# Formats export_sales can write
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Sale lines read from the database and written out per step
+EXPORT_CHUNK_SIZE = 5000
+
+
+# Work out the export format from a file name
+def format_for_path(path):
+    """
+    Picks the export format from a file extension: ".jsonl" or ".json" give
+    JSON Lines, anything else CSV.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return "jsonl" if extension in (".jsonl", ".json") else "csv"
+
+
+# Write the sales in a date range to a file
+def export_sales(path, start=None, end=None, fmt=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """
+    Streams the sale lines from start up to, but not including, end into a
+    CSV or JSON Lines file, one chunk at a time, so memory use does not grow
+    with the size of the range. The file is written under a temporary name and
+    moved into place when complete.
+    Args:
+        path (str): File to write.
+        start (str): Inclusive "YYYY-MM-DD" date, or None for no lower bound.
+        end (str): Exclusive "YYYY-MM-DD" date, or None for no upper bound.
+        fmt (str): One of EXPORT_FORMATS; picked from the file extension if None.
+        chunk_size (int): Sale lines read and written per step.
+        progress (callable): Called with the number of lines written after each chunk.
+    Returns:
+        int: Number of sale lines written.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    temporary = f"{path}.part"
+    written = 0
+    with open(temporary, "w", encoding="utf-8", newline="") as output:
+        if fmt == "csv":
+            writer = csv.writer(output)
+            writer.writerow(SALE_LINE_COLUMNS)
+        for rows in iter_sale_line_chunks(start, end, chunk_size):
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                output.write("".join(json.dumps(dict(zip(SALE_LINE_COLUMNS, row))) + "\n" for row in rows))
+            written += len(rows)
+            if progress:
+                progress(written)
+    os.replace(temporary, path)
+    return written
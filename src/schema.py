@@ -0,0 +1,319 @@
+import os
+from archive import archived_hourly_totals, upgrade_archives
+from db import POS_DB, db_path, get_connection
+from inventory_db import _rebuild_daily_totals
+
+# Files written by versions that kept the menu and the sales in separate databases
+LEGACY_MENU_DB = "menu.db"
+LEGACY_INVENTORY_DB = "inventory.db"
+
+# Suffix a legacy file is renamed with once its data has been migrated
+MIGRATED_SUFFIX = ".migrated"
+
+
+def _create_v1(cursor):
+    # Menu items are referenced by sales, so removing one only marks it deleted
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price_cents INTEGER NOT NULL,
+            image_path TEXT,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name ON items(name)")
+
+    # menu_log holds the latest change of each item, so caches can pick up
+    # edits without reloading the whole menu. AUTOINCREMENT keeps seq growing
+    # even when the newest entry is replaced.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS menu_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL UNIQUE
+        )
+    ''')
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS items_log_{event.lower()} AFTER {event} ON items
+            BEGIN
+                INSERT OR REPLACE INTO menu_log (item_id) VALUES ({row}.id);
+            END
+        ''')
+    # An update that renumbers an item also retires its old id
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_log_renumber AFTER UPDATE OF id ON items
+        WHEN OLD.id != NEW.id
+        BEGIN
+            INSERT OR REPLACE INTO menu_log (item_id) VALUES (OLD.id);
+        END
+    ''')
+
+    # One header row per checkout; amounts are whole centavos so sums are exact
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            uid TEXT
+        )
+    ''')
+    # A sale queued twice (e.g. replayed from the journal) is stored once
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_uid ON sales(uid)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)")
+
+    # One row per item on a checkout
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sale_lines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sale_id INTEGER NOT NULL REFERENCES sales(id) ON DELETE CASCADE,
+            item_id INTEGER NOT NULL REFERENCES items(id),
+            quantity INTEGER NOT NULL,
+            price_cents INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_lines_sale_id ON sale_lines(sale_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_lines_item_id ON sale_lines(item_id)")
+
+    # Per-day, per-item totals kept up to date by record_sale so reports
+    # read O(items) rows instead of every sale line
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_item_totals (
+            day TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, item_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Sales before archived_before have been moved to monthly archive files
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            archived_before TEXT NOT NULL
+        )
+    ''')
+
+    # Which terminal this is and the last sale shipped to the central store
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS replication_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            terminal_id TEXT NOT NULL,
+            shipped_through INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Keep the old orders shape available for readers
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS orders AS
+        SELECT l.id, i.name AS item_name, l.quantity, l.price_cents / 100.0 AS price,
+               l.total_cents / 100.0 AS total, s.date
+        FROM sale_lines l JOIN sales s ON s.id = l.sale_id JOIN items i ON i.id = l.item_id
+    ''')
+
+
+def _has_table(cursor, schema, name):
+    cursor.execute(f"SELECT type FROM {schema}.sqlite_master WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == "table"
+
+
+def _carry_sequence(cursor, schema, legacy_table, table):
+    # Keep AUTOINCREMENT counting on from the legacy file, so ids of rows it
+    # had already archived or shipped are never handed out again
+    if not _has_table(cursor, schema, "sqlite_sequence"):
+        return
+    cursor.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = ?", (legacy_table,))
+    row = cursor.fetchone()
+    if row is None:
+        return
+    cursor.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (row[0], table))
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, row[0]))
+
+
+def _import_legacy_menu(cursor):
+    cursor.execute('''INSERT INTO items (id, name, price_cents, image_path)
+                      SELECT id, name, CAST(round(price * 100) AS INTEGER), image_path
+                      FROM legacy_menu.menu_items''')
+    _carry_sequence(cursor, "legacy_menu", "menu_items", "items")
+
+
+def _import_legacy_inventory(cursor):
+    # Gather the lines from whichever shape the file has: the merged orders
+    # table of the first versions, or the sales and sale_lines ledger
+    cursor.execute('''
+        CREATE TEMP TABLE legacy_lines (
+            line_id INTEGER, sale_id INTEGER, date TEXT, uid TEXT,
+            item_name TEXT, quantity INTEGER, price_cents INTEGER, total_cents INTEGER
+        )
+    ''')
+    if _has_table(cursor, "legacy_inventory", "orders"):
+        cursor.execute('''INSERT INTO temp.legacy_lines
+                          SELECT id, id, date, NULL, item_name, quantity,
+                                 CAST(round(price * 100) AS INTEGER), CAST(round(total * 100) AS INTEGER)
+                          FROM legacy_inventory.orders''')
+        _carry_sequence(cursor, "legacy_inventory", "orders", "sales")
+    if _has_table(cursor, "legacy_inventory", "sale_lines"):
+        cursor.execute("PRAGMA legacy_inventory.table_info(sales)")
+        uid = "s.uid" if "uid" in [column[1] for column in cursor.fetchall()] else "NULL"
+        cursor.execute(f'''INSERT INTO temp.legacy_lines
+                           SELECT l.id, s.id, s.date, {uid}, l.item_name, l.quantity,
+                                  CAST(round(l.price * 100) AS INTEGER), CAST(round(l.total * 100) AS INTEGER)
+                           FROM legacy_inventory.sales s JOIN legacy_inventory.sale_lines l ON l.sale_id = s.id''')
+        _carry_sequence(cursor, "legacy_inventory", "sales", "sales")
+        _carry_sequence(cursor, "legacy_inventory", "sale_lines", "sale_lines")
+
+    # Names sold but no longer on the menu, including ones only left in the
+    # rollup of archived days, become deleted items at their last known price
+    cursor.execute('''INSERT INTO items (name, price_cents, deleted)
+                      SELECT item_name, price_cents, 1 FROM (
+                          SELECT item_name, price_cents, MAX(line_id) FROM temp.legacy_lines GROUP BY item_name
+                      )
+                      WHERE item_name NOT IN (SELECT name FROM items)''')
+    has_rollup = _has_table(cursor, "legacy_inventory", "daily_item_totals")
+    if has_rollup:
+        cursor.execute('''INSERT INTO items (name, price_cents, deleted)
+                          SELECT DISTINCT item_name, 0, 1 FROM legacy_inventory.daily_item_totals
+                          WHERE item_name NOT IN (SELECT name FROM items)''')
+    # Where a name was used twice, sales go to the lowest id
+    cursor.execute("CREATE TEMP TABLE legacy_item_ids AS SELECT name, MIN(id) AS id FROM items GROUP BY name")
+    cursor.execute("CREATE INDEX temp.idx_legacy_item_ids ON legacy_item_ids(name)")
+
+    cursor.execute('''INSERT INTO sales (id, date, total_cents, uid)
+                      SELECT sale_id, MIN(date), SUM(total_cents), MIN(uid) FROM temp.legacy_lines
+                      GROUP BY sale_id ORDER BY sale_id''')
+    cursor.execute('''INSERT INTO sale_lines (id, sale_id, item_id, quantity, price_cents, total_cents)
+                      SELECT l.line_id, l.sale_id, m.id, l.quantity, l.price_cents, l.total_cents
+                      FROM temp.legacy_lines l JOIN temp.legacy_item_ids m ON m.name = l.item_name
+                      ORDER BY l.line_id''')
+
+    for table in ("archive_state", "replication_state"):
+        if _has_table(cursor, "legacy_inventory", table):
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM legacy_inventory.{table}")
+
+    # Archived days only survive in the old rollup; every later day is rebuilt
+    # from the migrated lines
+    if has_rollup:
+        cursor.execute('''INSERT INTO daily_item_totals (day, item_id, quantity, total_cents)
+                          SELECT r.day, m.id, r.quantity, CAST(round(r.total * 100) AS INTEGER)
+                          FROM legacy_inventory.daily_item_totals r
+                          JOIN temp.legacy_item_ids m ON m.name = r.item_name
+                          WHERE r.day < (SELECT COALESCE(MAX(archived_before), '') FROM archive_state)''')
+    _rebuild_daily_totals(cursor)
+
+    cursor.execute("DROP TABLE temp.legacy_lines")
+    cursor.execute("DROP TABLE temp.legacy_item_ids")
+
+
+def _migrate_v1(cursor, legacy):
+    _create_v1(cursor)
+    if "legacy_menu" in legacy:
+        _import_legacy_menu(cursor)
+    if "legacy_inventory" in legacy:
+        _import_legacy_inventory(cursor)
+
+
+def _migrate_v2(cursor, legacy):
+    # Optional PLU or barcode per item; two items on the menu cannot share one,
+    # but a removed item's code can be given to a new item
+    cursor.execute("ALTER TABLE items ADD COLUMN code TEXT")
+    cursor.execute("CREATE UNIQUE INDEX idx_items_code ON items(code) WHERE code IS NOT NULL AND deleted = 0")
+
+
+def _migrate_v3(cursor, legacy):
+    # Revenue per hour of each day, kept up to date by record_sale like
+    # daily_item_totals, so hourly reports read O(hours) rows
+    cursor.execute('''
+        CREATE TABLE hourly_totals (
+            day TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, hour)
+        ) WITHOUT ROWID
+    ''')
+    # Every sale still here, including unshipped ones older than the archive
+    # cutoff, then the sales already moved out to the archive files
+    cursor.execute('''INSERT INTO hourly_totals (day, hour, total_cents)
+                      SELECT substr(date, 1, 10), CAST(substr(date, 12, 2) AS INTEGER), SUM(total_cents)
+                      FROM sales GROUP BY 1, 2''')
+    cursor.executemany('''INSERT INTO hourly_totals (day, hour, total_cents) VALUES (?, ?, ?)
+                          ON CONFLICT (day, hour) DO UPDATE SET total_cents = total_cents + excluded.total_cents''',
+                       archived_hourly_totals())
+
+
+# Schema changes in order; MIGRATIONS[n] takes the database from version n to n + 1.
+# Each step gets a cursor inside the migration's transaction and the legacy
+# databases attached to it, by schema name.
+MIGRATIONS = [
+    _migrate_v1,
+    _migrate_v2,
+    _migrate_v3,
+]
+
+# Version the schema is migrated to; stored in PRAGMA user_version
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _legacy_files():
+    # Only the first migration reads the files older versions left behind
+    legacy = {}
+    for schema, name in (("legacy_menu", LEGACY_MENU_DB), ("legacy_inventory", LEGACY_INVENTORY_DB)):
+        if os.path.exists(db_path(name)):
+            legacy[schema] = db_path(name)
+    return legacy
+
+
+def _retire(path):
+    # Keep the migrated file, with any journal files, as a backup under a new name
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.replace(path + suffix, path + suffix + MIGRATED_SUFFIX)
+
+
+# Bring the database up to the current schema
+def migrate():
+    """
+    Creates pos.db or upgrades it to SCHEMA_VERSION, one migration per
+    transaction. The first migration also moves the menu and sales out of the
+    menu.db and inventory.db files of older versions, then renames those files
+    with a ".migrated" suffix, and converts existing archive files to the new
+    shape. Safe to call on every start: an up-to-date database costs one PRAGMA.
+    """
+    conn = get_connection(POS_DB)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    legacy = _legacy_files() if version == 0 else {}
+    for schema, path in legacy.items():
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    try:
+        while version < SCHEMA_VERSION:
+            # IMMEDIATE takes the write lock first, so a second process starting
+            # at the same time waits and then finds the work done
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            try:
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if version < SCHEMA_VERSION:
+                    MIGRATIONS[version](cursor, legacy)
+                    version += 1
+                    cursor.execute(f"PRAGMA user_version = {version}")
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                cursor.close()
+    finally:
+        for schema in legacy:
+            conn.execute(f"DETACH DATABASE {schema}")
+
+    if legacy:
+        upgrade_archives()
+        for path in legacy.values():
+            _retire(path)
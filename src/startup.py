@@ -0,0 +1,45 @@
+import sys
+import time
+
+# Imported first by main.py, so this is as close to process start as Python gets
+_started = time.perf_counter()
+_marks = []
+_report_when_done = False
+
+
+# Note how long startup has taken so far
+def mark(label):
+    """
+    Records the time since startup under a label. Cheap enough to leave in
+    place; the marks are only printed when report() is called.
+    Args:
+        label (str): What has just finished, e.g. "import PyQt6".
+    """
+    _marks.append((label, time.perf_counter() - _started))
+
+
+# Print the recorded startup steps
+def report(stream=None):
+    """Prints each recorded step with its duration and the elapsed time."""
+    stream = stream or sys.stderr
+    previous = 0.0
+    print("startup profile (ms)      step    elapsed", file=stream)
+    for label, elapsed in _marks:
+        print(f"  {label:<22} {(elapsed - previous) * 1000:8.1f} {elapsed * 1000:10.1f}", file=stream)
+        previous = elapsed
+
+
+# Ask for the profile to be printed once startup has finished
+def report_when_done(flag=True):
+    global _report_when_done
+    _report_when_done = flag
+
+
+# Mark the end of startup
+def done(label):
+    """Records the final startup step and prints the profile if it was asked for."""
+    global _report_when_done
+    mark(label)
+    if _report_when_done:
+        _report_when_done = False
+        report()
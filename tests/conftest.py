@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from db import POS_DB, get_connection, set_data_dir  # noqa: E402
+from schema import migrate  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Points the register at an empty, migrated data directory for one test."""
+    set_data_dir(str(tmp_path))
+    migrate()
+    yield tmp_path
+    set_data_dir(None)
+
+
+@pytest.fixture
+def query_plan():
+    """Returns a function that runs a callable and returns the query plan of the sale line query it made."""
+    def plan(run):
+        conn = get_connection(POS_DB)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            run()
+        finally:
+            conn.set_trace_callback(None)
+        select = next(statement for statement in statements if "sale_lines" in statement)
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + select)]
+    return plan
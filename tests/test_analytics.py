@@ -0,0 +1,22 @@
+import pytest
+
+from inventory_db import record_sale
+from menu_db import add_menu_item
+
+np = pytest.importorskip("numpy")
+
+from analytics import compute_analytics  # noqa: E402
+
+
+def test_daily_trend_has_no_change_on_the_first_day(data_dir):
+    item_id = add_menu_item("Pastil", 2500, None)
+    record_sale([(item_id, 2, 2500, 5000)], "2024-03-01 09:15:00")
+    record_sale([(item_id, 1, 2500, 2500)], "2024-03-03 12:30:00")
+
+    trend = compute_analytics()["daily_trend"]
+
+    assert trend == [
+        ("2024-03-01", 50.0, None),
+        ("2024-03-02", 0.0, -50.0),
+        ("2024-03-03", 25.0, 25.0),
+    ]
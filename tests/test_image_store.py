@@ -0,0 +1,37 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtGui import QColor, QImage  # noqa: E402
+
+from image_store import PRUNE_GRACE_SECONDS, prune_images, store_image  # noqa: E402
+
+
+def _write_image(path):
+    image = QImage(64, 48, QImage.Format.Format_RGB32)
+    image.fill(QColor(200, 120, 40))
+    assert image.save(str(path), "PNG")
+    return str(path)
+
+
+def test_storing_an_image_again_restarts_its_grace_period(data_dir):
+    upload = _write_image(data_dir / "upload.png")
+    stored = store_image(upload)
+    stale = time.time() - 2 * PRUNE_GRACE_SECONDS
+    os.utime(stored, (stale, stale))
+
+    assert store_image(upload) == stored
+    assert prune_images([]) == 0
+    assert os.path.exists(stored)
+
+
+def test_prune_removes_old_unreferenced_images(data_dir):
+    stored = store_image(_write_image(data_dir / "upload.png"))
+    stale = time.time() - 2 * PRUNE_GRACE_SECONDS
+    os.utime(stored, (stale, stale))
+
+    assert prune_images([]) == 1
+    assert not os.path.exists(stored)
@@ -0,0 +1,15 @@
+from inventory_db import get_all_orders, record_sale
+from menu_db import add_menu_item
+
+
+def test_all_orders_come_newest_first_off_the_date_index(data_dir, query_plan):
+    item_id = add_menu_item("Pastil", 2500, None)
+    record_sale([(item_id, 1, 2500, 2500)], "2024-03-01 09:00:00")
+    record_sale([(item_id, 2, 2500, 5000)], "2024-03-02 10:00:00")
+
+    plan = query_plan(lambda: next(get_all_orders()))
+
+    assert any("idx_sales_date" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+    assert [order[5] for order in get_all_orders()] == ["2024-03-02 10:00:00", "2024-03-01 09:00:00"]
+    assert list(get_all_orders())[0][1:5] == ("Pastil", 2, 25.0, 50.0)
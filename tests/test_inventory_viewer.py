@@ -0,0 +1,17 @@
+from inventory_db import record_sale
+from inventory_viewer import iter_sale_line_chunks
+from menu_db import add_menu_item
+
+
+def test_unbounded_export_reads_the_date_index_without_sorting(data_dir, query_plan):
+    item_id = add_menu_item("Pastil", 2500, None)
+    record_sale([(item_id, 1, 2500, 2500)], "2024-03-02 10:00:00")
+    record_sale([(item_id, 2, 2500, 5000)], "2024-03-01 09:00:00")
+
+    plan = query_plan(lambda: list(iter_sale_line_chunks()))
+
+    assert any("idx_sales_date" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+    assert [row[1] for chunk in iter_sale_line_chunks() for row in chunk] == [
+        "2024-03-01 09:00:00", "2024-03-02 10:00:00"
+    ]
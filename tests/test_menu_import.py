@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from menu_db import add_menu_item, load_menu_items  # noqa: E402
+from menu_import import import_menu  # noqa: E402
+
+
+def test_codes_that_differ_only_in_case_are_rejected(data_dir):
+    add_menu_item("Pastil", 2500, None, "ABC")
+    manifest = data_dir / "menu.csv"
+    manifest.write_text("name,price,code\nRice,15,abc\nEgg,12, Xy \nTea,20,xY\n", encoding="utf-8")
+
+    summary = import_menu(str(manifest))
+
+    assert summary["added"] == 1
+    assert [(row, name) for row, name, _ in summary["problems"]] == [(2, "Rice"), (4, "Tea")]
+    assert sorted(item["name"] for item in load_menu_items()) == ["Egg", "Pastil"]